@@ -1,6 +1,3 @@
-import random
-
-
 class AgentInterface():
     """Defines an agent that can interact with the game"""
 
@@ -26,14 +23,14 @@ class RandomAgent(AgentInterface):
 
         if 'Decline' in options and len(options) > 1:
             options.remove('Decline')
-        return {'value': random.choice(options)}
+        return {'value': gc.rng.choice(options)}
 
     def choose_reveal(self, player, gc):
         """Randomly reveal identity with increasing probability as the
         game progresses"""
 
         reveal_chance = gc.round_count / 20
-        return (random.random() <= reveal_chance)
+        return (gc.rng.random() <= reveal_chance)
 
 
 Agent = RandomAgent
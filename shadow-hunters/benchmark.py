@@ -0,0 +1,230 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+
+from elements import ElementFactory
+from game_context import GameContext
+from helpers import color_format, fresh_gc_ef
+from player import Player
+from simulate import make_jobs, simulate_game
+from utils import make_hash_sha256
+
+# benchmark.py
+# Measures the engine's speed, saves the measurements as JSON baselines, and
+# compares new measurements against a baseline.
+#
+# Usage: python shadow-hunters/benchmark.py --save baseline.json
+#        python shadow-hunters/benchmark.py --compare baseline.json -t 0.2
+#
+# `--compare` exits with status 1 if any metric regressed by more than the
+# threshold (a fraction of the baseline), so it can gate a build.
+
+
+def timed(fn, samples):
+    """Wrap `fn` so that the duration of every call is appended to
+    `samples`."""
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        samples.append(time.perf_counter() - start)
+        return result
+    return wrapper
+
+
+def per_call(stmt, number, repeat=7):
+    """Best time per call of `stmt` over `repeat` runs of `number` calls."""
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+def metric(value, unit, higher_is_better=False):
+    return {'value': value, 'unit': unit,
+            'higher_is_better': higher_is_better}
+
+
+def measure_games(n_games, players, seed, repeat=3):
+    """Games per second for each player count, playing headless games
+    (setup included) in this process. The fastest of `repeat` runs of the
+    same games counts, as with timeit."""
+
+    metrics = {}
+    for n in players:
+        jobs = make_jobs(n_games, [n], seed)
+        elapsed = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for job in jobs:
+                simulate_game(job)
+            elapsed.append(time.perf_counter() - start)
+        metrics['games_per_sec.{}'.format(n)] = metric(
+            n_games / min(elapsed), 'games/s', higher_is_better=True)
+    return metrics
+
+
+def measure_turns(n_games, players, seed):
+    """Time every turn, state dump and message format of headless games
+    played with the server's handlers: every update dumps the game, and
+    every message is formatted for the frontend."""
+
+    turns, dumps, formats = [], [], []
+    for seed, n in make_jobs(n_games, players, seed):
+        gc, ef = fresh_gc_ef(n, seed=seed)
+        for p in gc.players:
+            p.takeTurn = timed(p.takeTurn, turns)
+        dump = timed(gc.dump, dumps)
+        fmt = timed(color_format, formats)
+        gc.update_h = lambda: dump()
+        gc.tell_h = lambda x, y, *z: fmt(x, y, gc)
+        gc.play()
+
+    return {
+        'take_turn.mean': metric(statistics.mean(turns), 's'),
+        'take_turn.p99': metric(percentile(turns, 99), 's'),
+        'dump.mean': metric(statistics.mean(dumps), 's'),
+        'color_format.mean': metric(statistics.mean(formats), 's')
+    }
+
+
+def measure_calls(seed):
+    """Time per call of the engine's hot functions, in isolation."""
+
+    # Every GameContext needs fresh players and elements, so only the
+    # constructor itself is timed
+    samples = []
+    for i in range(200):
+        rng = random.Random(seed + i)
+        ef = ElementFactory(rng)
+        players = [Player("CPU_{}".format(j), 'unused', 'unused', True)
+                   for j in range(1, 4 + i % 5 + 1)]
+        timed(GameContext, samples)(
+            players=players,
+            characters=ef.CHARACTERS,
+            black_cards=ef.BLACK_DECK,
+            white_cards=ef.WHITE_DECK,
+            hermit_cards=ef.HERMIT_DECK,
+            areas=ef.AREAS,
+            ask_h=lambda x, y, z: {'value': rng.choice(y['options'])},
+            tell_h=lambda x, y, *z: 0,
+            show_h=lambda x, *y: 0,
+            update_h=lambda: 0,
+            rng=rng
+        )
+
+    # Hermit cards are never held, so the deck can be drawn from forever
+    gc, ef = fresh_gc_ef(5, seed=seed)
+    gc.play()
+    public_state, private_state = gc.dump()
+    draw = ef.HERMIT_DECK.drawCard
+
+    return {
+        'game_context_init.median': metric(
+            statistics.median(samples), 's'),
+        'draw_card': metric(per_call(draw, 10000), 's'),
+        'make_hash_sha256': metric(
+            per_call(lambda: make_hash_sha256(public_state), 200), 's')
+    }
+
+
+def run(n_games=50, players=(4, 5, 6, 7, 8), seed=0):
+    """Run every benchmark. Returns the results, ready to be saved as a
+    baseline."""
+
+    metrics = {}
+    metrics.update(measure_games(n_games, players, seed))
+    metrics.update(measure_turns(n_games, players, seed))
+    metrics.update(measure_calls(seed))
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'n_games': n_games,
+        'metrics': metrics
+    }
+
+
+def compare(baseline, results, threshold):
+    """Compare results against a baseline. Returns a row (name, baseline
+    value, new value, change, regressed) for every metric in both, where
+    change is the relative slowdown (negative if faster)."""
+
+    rows = []
+    for name, old in sorted(baseline['metrics'].items()):
+        new = results['metrics'].get(name)
+        if new is None:
+            continue
+        if old['higher_is_better']:
+            change = old['value'] / new['value'] - 1
+        else:
+            change = new['value'] / old['value'] - 1
+        rows.append((name, old['value'], new['value'], change,
+                     change > threshold))
+    return rows
+
+
+def format_results(results):
+    lines = ["{:<28} {:>14}".format("Metric", "Value")]
+    for name, m in sorted(results['metrics'].items()):
+        lines.append("{:<28} {:>14.6g} {}".format(
+            name, m['value'], m['unit']))
+    return "\n".join(lines)
+
+
+def format_comparison(rows, threshold):
+    lines = ["{:<28} {:>12} {:>12} {:>8}".format(
+        "Metric", "Baseline", "New", "Change")]
+    for name, old, new, change, regressed in rows:
+        lines.append("{:<28} {:>12.6g} {:>12.6g} {:>+7.1%}{}".format(
+            name, old, new, change, "  REGRESSED" if regressed else ""))
+    n_regressed = sum(row[-1] for row in rows)
+    lines.append("\n{} of {} metrics regressed by more than {:.0%}".format(
+        n_regressed, len(rows), threshold))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Shadow Hunters engine.")
+    parser.add_argument('-n', '--n-games', type=int, default=50,
+                        help="games to play per player count")
+    parser.add_argument('-p', '--players', type=int, nargs='+',
+                        default=[4, 5, 6, 7, 8], choices=range(4, 9),
+                        help="player counts to benchmark")
+    parser.add_argument('-s', '--seed', type=int, default=0,
+                        help="seed of the first game")
+    parser.add_argument('--save', metavar='PATH',
+                        help="save the results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH',
+                        help="compare the results against a JSON baseline")
+    parser.add_argument('-t', '--threshold', type=float, default=0.2,
+                        help="slowdown that fails --compare (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    results = run(args.n_games, args.players, args.seed)
+    print(format_results(results))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, results, args.threshold)
+        print()
+        print(format_comparison(rows, args.threshold))
+        if any(row[-1] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
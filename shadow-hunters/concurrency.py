@@ -1,9 +1,81 @@
+import functools
+import inspect
+import operator
+import sys
 from threading import Lock
 
+import greenlet
+
 # concurrency.py
+# Implements the engine's locks, and the bridge that runs games on an
+# asyncio event loop.
 
 # Lock for manipulating reveals (globally accessible)
 reveal_lock = Lock()
 
-# Lock for manipulating the rooms data structure
-connection_lock = Lock()
+# Locks for manipulating rooms are kept per room (see registry.py)
+
+
+# The engine is synchronous: handlers such as ask_h return their answers.
+# To run it on an event loop, `run_sync` runs engine code in a greenlet of
+# its own. Whenever the code needs an awaitable (e.g. an async ask_h waiting
+# on a player), `await_only` suspends the greenlet and hands the awaitable to
+# `run_sync`, which awaits it on the loop and resumes the greenlet with the
+# result. Each game then costs a greenlet rather than a thread, and any
+# number of games can be awaited at once, while the synchronous API stays as
+# it is.
+
+class _EngineGreenlet(greenlet.greenlet):
+    def __init__(self, fn, driver):
+        super().__init__(fn, driver)
+        self.driver = driver
+
+
+def await_only(awaitable):
+    # Wait for an awaitable from engine code running under run_sync
+    current = greenlet.getcurrent()
+    if not isinstance(current, _EngineGreenlet):
+        if inspect.iscoroutine(awaitable):
+            awaitable.close()
+        raise RuntimeError("await_only() must be called under run_sync()")
+    return current.driver.switch(awaitable)
+
+
+async def run_sync(fn, *args, **kwargs):
+    # Run the synchronous function fn, awaiting every awaitable it waits for
+    # with await_only, and return its result
+    engine = _EngineGreenlet(fn, greenlet.getcurrent())
+    result = engine.switch(*args, **kwargs)
+    while not engine.dead:
+        try:
+            value = await result
+        except BaseException:
+            result = engine.throw(*sys.exc_info())
+        else:
+            result = engine.switch(value)
+    return result
+
+
+def awaiting(handler):
+    # Adapt a coroutine function handler for the engine, which calls it
+    # synchronously. Other handlers are returned as they are
+    if not inspect.iscoroutinefunction(handler):
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        return await_only(handler(*args, **kwargs))
+    return wrapper
+
+
+def handler(name):
+    # A handler attribute (e.g. GameContext.ask_h) that adapts whatever is
+    # assigned to it with `awaiting`, so that coroutine function handlers
+    # work however they are set: in the constructor, or later (e.g. by a
+    # server swapping handlers mid-game). Its getter is an attrgetter, so
+    # that reading the handler in the engine's hot paths stays cheap
+    attr = '_' + name
+
+    def set_handler(self, fn):
+        setattr(self, attr, awaiting(fn))
+    return property(operator.attrgetter(attr), set_handler)
@@ -40,6 +40,9 @@ TEXT_COLORS = {
     'Underworld Gate': 'rgb(150,0,150)'
 }
 
+# Number of rolls a die draws from the random stream at a time
+DICE_BUFFER_SIZE = 64
+
 # Number of gameplay tests to run
 N_GAMEPLAY_TESTS = 100  # = 500 games
 N_REGRESSION_TESTS = 20  # = 100 games
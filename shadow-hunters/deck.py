@@ -1,5 +1,4 @@
 import random
-import copy
 
 from card import Card
 # deck.py
@@ -7,37 +6,63 @@ from card import Card
 
 
 class Deck:
-    def __init__(self, cards):
+    def __init__(self, cards, rng=random):
         # Make sure a list is passed to cards
         if not isinstance(cards, list):
             raise ValueError("cards must be a list.")
 
-        self.cards = cards  # note that cards are ordered [bottom, ... top]
-
-        # Make sure every card in self.cards is a Card object
-        for c in self.cards:
+        # Make sure every card in cards is a Card object
+        for c in cards:
             if not isinstance(c, Card):
                 raise ValueError("One or more cards is not a Card object.")
 
-        self.discard = []
+        # Every card is stored once, in `definitions`. The draw pile (`order`)
+        # and the discard pile (`discarded`) are lists of card ids, i.e.
+        # indices into `definitions`, ordered [bottom, ... top]. Ids of
+        # equipment cards held by players are kept in `held` until the cards
+        # are returned to the discard pile.
+        self.definitions = list(cards)
+        self.ids = {id(c): i for i, c in enumerate(self.definitions)}
+        self.order = list(range(len(self.definitions)))
+        self.discarded = []
+        self.held = set()
+
+        self.rng = rng
         self.shuffle()
 
+    @property
+    def cards(self):
+        return [self.definitions[i] for i in self.order]
+
+    @property
+    def discard(self):
+        return [self.definitions[i] for i in self.discarded]
+
     def shuffle(self):
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.order)
 
     def drawCard(self):
-        if len(self.cards) > 0:
-            drawn = self.cards.pop()
-
-            # Discard the card IFF it is not an equipment card
-            if not drawn.is_equipment:
-                self.discard.append(copy.deepcopy(drawn))
+        # Reshuffle the discard pile into the draw pile if it's empty
+        if not self.order:
+            self.order, self.discarded = self.discarded, []
+            self.shuffle()
 
-            return drawn
+        # Discard the card IFF it is not an equipment card
+        i = self.order.pop()
+        drawn = self.definitions[i]
+        if drawn.is_equipment:
+            self.held.add(i)
         else:
-            self.cards, self.discard = self.discard, []
-            self.shuffle()
-            return self.drawCard()
+            self.discarded.append(i)
+
+        return drawn
 
     def addToDiscard(self, card):
-        self.discard.append(card)
+        # Cards from elsewhere join the deck for the rest of the game
+        if id(card) not in self.ids:
+            self.ids[id(card)] = len(self.definitions)
+            self.definitions.append(card)
+
+        i = self.ids[id(card)]
+        self.held.discard(i)
+        self.discarded.append(i)
@@ -1,19 +1,55 @@
 import random
+from fractions import Fraction
+from operator import add, sub
 
 # Die.py
-# Implements a Die object with a specified number of sides.
+# Implements a Die object with a specified number of sides, and the
+# distributions of the rolls players make with a 4-sided and a 6-sided die.
 
 
 class Die:
-    def __init__(self, n_sides):
+    def __init__(self, n_sides, rng=random, buffer_size=0):
 
         # Make sure die has a positive number of sides
         if not n_sides > 0:
             raise ValueError("n_sides must be greater than 0")
 
+        # Make sure the buffer size isn't negative
+        if buffer_size < 0:
+            raise ValueError("buffer_size must not be negative")
+
         self.n_sides = n_sides
+        self.faces = range(1, n_sides + 1)
         self.state = None
+        self.rng = rng
+
+        # A buffered die draws its rolls from `rng` in blocks of buffer_size
+        # rolls rather than one at a time
+        self.buffer_size = buffer_size
+        self.buffer = []
 
     def roll(self):
-        self.state = random.randint(1, self.n_sides)
+        if self.buffer_size:
+            if not self.buffer:
+                self.buffer = self.rng.choices(self.faces, k=self.buffer_size)
+            self.state = self.buffer.pop()
+        else:
+            self.state = self.rng.randint(1, self.n_sides)
         return self.state
+
+
+def distribution(n_sides_a, n_sides_b, binop=add):
+    # Returns {result: probability} for rolling two dice and applying binop
+    # to the higher and the lower roll, as Player.rollDice does
+    p = Fraction(1, n_sides_a * n_sides_b)
+    dist = {}
+    for a in range(1, n_sides_a + 1):
+        for b in range(1, n_sides_b + 1):
+            result = binop(max(a, b), min(a, b))
+            dist[result] = dist.get(result, 0) + p
+    return dict(sorted(dist.items()))
+
+
+# Movement rolls (d4 + d6) and attack rolls (|d6 - d4|)
+MOVEMENT_ROLLS = distribution(4, 6, add)
+ATTACK_ROLLS = distribution(4, 6, sub)
@@ -1,7 +1,8 @@
 from die import Die
 from zone import Zone
 
-from utils import make_hash_sha256
+from utils import StateHasher
+import concurrency as R
 import constants as C
 import random
 import copy
@@ -11,14 +12,29 @@ import copy
 
 
 class GameContext:
+
+    # Message handlers. Handlers may also be coroutine functions (whenever
+    # they are assigned), in which case the game must be played with
+    # playAsync
+    ask_h = R.handler('ask_h')
+    tell_h = R.handler('tell_h')
+    show_h = R.handler('show_h')
+    update_h = R.handler('update_h')
+
     def __init__(self, players, characters, black_cards, white_cards,
                  hermit_cards, areas, ask_h, tell_h, show_h, update_h,
-                 modifiers=dict()):
+                 modifiers=dict(), rng=None):
+
+        # Instantiate this game's random stream, which every random choice in
+        # the game (dice, decks, setup, and agents) draws from. The card decks
+        # should be built with the same stream
+        self.rng = rng if rng else random.Random()
 
         # Instantiate gameplay objects
         self.players = players
         self.turn_order = copy.copy(players)
         self.round_count = 0
+        self.turn = None  # index into turn_order, once the game has started
 
         # Assign "local delexicalizations" for each player.
         # Reason: This allows a game-playing agent to parse data dumps about
@@ -37,6 +53,9 @@ class GameContext:
             inv = dict(enumerate(d)).items()
             p.delexicalizations = {v.user_id: k for k, v in inv}
 
+        # Index each player's text color by user_id for message formatting
+        self.colors = {p.user_id: p.color for p in self.players}
+
         # Instantiate characters
         self.characters = characters
         if len(self.players) <= 6:
@@ -54,6 +73,12 @@ class GameContext:
 
         # Instantiate status
         self.game_over = False
+        self._setup_dumps = None
+        self.winners = []
+
+        # Win conditions are only re-evaluated after an event that can change
+        # their outcome (a death or a change of equipment)
+        self.win_check_due = True
 
         # Instantiate message handlers
         self.ask_h = ask_h
@@ -61,26 +86,25 @@ class GameContext:
         self.show_h = show_h
         self.update_h = update_h
 
-        # Instantiate answer bin
-        self.answer_bin = {
-            'answered': False,
-            'sid': '',
-            'data': {}
-        }
+        # Optional handler that is told how long each phase of a turn took,
+        # as phase_h(phase, seconds) (see Player.runPhase), and one that is
+        # called before every turn (see snapshot.Tracker)
+        self.phase_h = None
+        self.turn_h = None
+
+        # Instantiate answer bin (pending asks' mailboxes, keyed by user_id)
+        self.answer_bin = {}
 
         # Assign modifiers
         self.modifiers = modifiers
 
         # Instantiate dice
-        self.die4 = Die(4)
-        self.die6 = Die(6)
+        self.die4 = Die(4, self.rng, C.DICE_BUFFER_SIZE)
+        self.die6 = Die(6, self.rng, C.DICE_BUFFER_SIZE)
 
         # Randomly shuffle areas across zones
-        random.shuffle(areas)
-        self.zones = [Zone([areas.pop(), areas.pop()]) for i in range(3)]
-        for z in self.zones:
-            for a in z.areas:
-                a.zone = z
+        self.rng.shuffle(areas)
+        self.setBoard([areas.pop() for i in range(6)])
 
         # Figure out how many of each allegiance there has to be
         counts_dict = {
@@ -91,9 +115,10 @@ class GameContext:
             8: {C.Alleg.Hunter: 3, C.Alleg.Neutral: 2, C.Alleg.Shadow: 3},
         }
 
-        # Randomly assign characters and point game context
-        character_q = copy.deepcopy(self.characters)
-        random.shuffle(character_q)
+        # Randomly assign characters and point game context (characters are
+        # immutable catalog entries, so they can be shared between games)
+        character_q = list(self.characters)
+        self.rng.shuffle(character_q)
         queue = []
         while character_q:
             ch = character_q.pop()
@@ -107,44 +132,115 @@ class GameContext:
             player.setCharacter(queue.pop())
             player.gc = self
 
-    def getLivePlayers(self, filter_fn=(lambda x: True)):
-        live = [p for p in self.players if p.state != C.PlayerState.Dead]
-        return list(filter(filter_fn, live))
+        # Index players by user_id, and by state and location
+        self.players_by_id = {p.user_id: p for p in self.players}
+        self.indexPlayers()
 
-    def getDeadPlayers(self, filter_fn=(lambda x: True)):
-        dead = [p for p in self.players if p.state == C.PlayerState.Dead]
-        return list(filter(filter_fn, dead))
-
-    def getPlayersAt(self, location_name):
-        live = self.getLivePlayers()
-        live_loc = [p for p in live if p.location]
-        return [p for p in live_loc if p.location.name == location_name]
-
-    def getAreas(self):
-        areas = []
+    def setBoard(self, areas):
+        # Lay out the six areas in zones of two, in order
+        self.zones = [Zone(areas[i:i + 2]) for i in range(0, 6, 2)]
         for z in self.zones:
             for a in z.areas:
-                areas.append(a.name)
-
-        return areas
+                a.zone = z
 
-    def getAreaFromRoll(self, roll_result):
-        destination_Area = None
+        # Compile the board layout into lookup tables, since it's fixed for
+        # the rest of the game: the area each roll leads to, and the zones
+        # out of range of each zone
+        self.area_names = [a.name for z in self.zones for a in z.areas]
+        self.area_by_roll = {}
+        self.other_zones = {}
         for z in self.zones:
+            self.other_zones[z] = [o for o in self.zones if o is not z]
             for a in z.areas:
-                if roll_result in a.domain:
-                    destination_Area = a
+                for roll in a.domain:
+                    self.area_by_roll[roll] = a
+
+    def indexPlayers(self):
+        # Rebuild the live/dead players, and count the live and dead players
+        # of each allegiance for the win conditions. Players call this
+        # whenever their state changes, so that lookups don't have to filter
+        # self.players. Every index lists players in the same order as
+        # self.players
+        n_dead = len(getattr(self, 'dead_players', []))
+        self.live_players = []
+        self.dead_players = []
+        self.live_allegs = dict.fromkeys(C.Alleg, 0)
+        self.dead_allegs = dict.fromkeys(C.Alleg, 0)
+        for p in self.players:
+            if p.state == C.PlayerState.Dead:
+                self.dead_players.append(p)
+                self.dead_allegs[p.character.alleg] += 1
+            else:
+                self.live_players.append(p)
+                self.live_allegs[p.character.alleg] += 1
+
+        if len(self.dead_players) != n_dead:
+            self.win_check_due = True
+        self.indexLocations()
+
+    def indexCharacters(self):
+        # Re-count the allegiances when a player's character changes, and
+        # re-check the win conditions, which the character decides
+        self.indexPlayers()
+        self.win_check_due = True
+
+    def indexLocations(self):
+        # Rebuild the per-area and per-zone occupants. Players call this
+        # whenever their location changes (dead players have none)
+        self.area_occupants = {}
+        self.zone_occupants = {}
+        self.zone_outsiders = {}
+        for p in self.live_players:
+            if p.location:
+                zone = p.location.zone
+                self.area_occupants.setdefault(p.location.name, []).append(p)
+                self.zone_occupants.setdefault(zone, []).append(p)
+                for z in self.other_zones[zone]:
+                    self.zone_outsiders.setdefault(z, []).append(p)
+
+    def getLivePlayers(self, filter_fn=None):
+        if filter_fn is None:
+            return list(self.live_players)
+        return list(filter(filter_fn, self.live_players))
+
+    def getDeadPlayers(self, filter_fn=None):
+        if filter_fn is None:
+            return list(self.dead_players)
+        return list(filter(filter_fn, self.dead_players))
+
+    def getPlayersAt(self, location_name):
+        return list(self.area_occupants.get(location_name, []))
+
+    def getPlayersInZone(self, zone):
+        return list(self.zone_occupants.get(zone, []))
+
+    def getPlayersOutsideZone(self, zone):
+        return list(self.zone_outsiders.get(zone, []))
 
-        return destination_Area
+    def getPlayer(self, user_id):
+        return self.players_by_id[user_id]
+
+    def getAreas(self):
+        return list(self.area_names)
+
+    def getAreaFromRoll(self, roll_result):
+        return self.area_by_roll.get(roll_result)
 
     def _checkWinConditions(self):
         return [p for p in self.players if p.character.win_cond(self, p)]
 
     def checkWinConditions(self, tell=True):
-        winners = self._checkWinConditions()
+        # Re-evaluate the win conditions only if something that decides them
+        # changed since the last check; otherwise the last winners stand
+        if self.win_check_due:
+            self.win_check_due = False
+            self.winners = self._checkWinConditions()
+            if self.winners and not self.game_over:
+                self.game_over = True
+                self.winners = self._checkWinConditions()  # Collect Allie
+
+        winners = self.winners
         if len(winners):
-            self.game_over = True
-            winners = self._checkWinConditions()  # Hack to collect Allie
             if tell:
                 display_data = {'type': 'win', 'winners': [
                     p.dump() for p in winners]}
@@ -159,47 +255,62 @@ class GameContext:
             return winners
 
     def play(self, debug=False):
-        game_hash = ""
-        turn = random.randint(0, len(self.turn_order) - 1)
+        # A game restored from a snapshot resumes at the turn it was on
+        hasher = StateHasher()
+        if self.turn is None:
+            self.turn = self.rng.randint(0, len(self.turn_order) - 1)
         while True:
-            # Hash each successive game state
-            # (effectively Reduce(states, lambda a, b: hash(a + b)))
+            if self.turn_h:
+                self.turn_h()
+
+            # Hash each successive game state into a running digest
             if debug:
-                hashed_game_state = make_hash_sha256(self.dump())
-                game_hash = make_hash_sha256(game_hash + hashed_game_state)
+                hasher.update(self.dump())
 
-            current_player = self.turn_order[turn]
+            current_player = self.turn_order[self.turn]
             if current_player.state != C.PlayerState.Dead:
                 current_player.takeTurn()
             winners = self.checkWinConditions()
             if winners:
                 break
-            turn += 1
-            if turn >= len(self.turn_order):
-                turn = 0
+            self.turn += 1
+            if self.turn >= len(self.turn_order):
+                self.turn = 0
                 self.round_count += 1
                 self.turn_order = list(self.players)
 
         if debug:
-            return game_hash
+            return hasher.digest()
+
+    async def playAsync(self, debug=False):
+        # Play the game as a coroutine, so that any number of games can be
+        # played on one event loop. The game runs under concurrency.run_sync,
+        # which awaits the answers of async handlers
+        return await R.run_sync(self.play, debug)
 
     def dump(self):
         # Note that public_players and private_state are no longer keyed by
         # socket_ids
-        public_zones = [z.dump() for z in self.zones]
+
+        # Zones and characters don't change once the game is set up, so they
+        # are only dumped once. Players cache their own dumps
+        if not self._setup_dumps:
+            self._setup_dumps = (
+                [z.dump() for z in self.zones],
+                [c.dump() for c in self.characters]
+            )
+        public_zones, public_characters = self._setup_dumps
         private_players = [p.dump() for p in self.players]
-        public_players = copy.deepcopy(private_players)
 
-        # Hide character information if player hasn't revealed themselves
-        for p in public_players:
-            if p['state'] == 2:
-                p['character'] = {}
+        # Public players hide character information if they haven't revealed
+        # themselves
+        public_players = [p.dumpPublic() for p in self.players]
 
         # Collect the public states
         public_state = {
             'zones': public_zones,
             'players': public_players,
-            'characters': [c.dump() for c in self.characters]
+            'characters': public_characters
         }
         private_state = private_players
 
@@ -1,5 +1,6 @@
 from game_context import GameContext
 from elements import ElementFactory
+import elements as E
 from player import Player
 
 import constants as C
@@ -8,69 +9,81 @@ import random
 # helper functions for frontend communication
 
 
-def color_format(str, args, gc):
+def _compile_color_index():
+
+    # map every element name to its text color, in order of precedence (the
+    # first element to claim a name keeps it)
+    index = {}
+    for c in E.ALL_CARDS:
+        card_type = c.color.name
+        card_color = 'Green' if card_type == 'Hermit' else card_type
+        index.setdefault(c.title, C.TEXT_COLORS[card_color])
+    index.setdefault('a Hermit Card', C.TEXT_COLORS['Green'])
+    for alleg in (C.Alleg.Shadow, C.Alleg.Hunter, C.Alleg.Neutral):
+        color = C.TEXT_COLORS[alleg.name.lower()]
+        for ch in E.CHARACTERS:
+            if ch.alleg == alleg:
+                index.setdefault(ch.name, color)
+        index.setdefault(alleg.name, color)
+    for a in E.AREAS:
+        index.setdefault(a.name, C.TEXT_COLORS[a.name])
+    return index
+
+
+# token => color lookup for every element name, compiled once at import time
+COLOR_INDEX = _compile_color_index()
 
-    # get all elements by name
-    ef = ElementFactory()
-    decks = ef.WHITE_DECK.cards + ef.BLACK_DECK.cards + ef.HERMIT_DECK.cards
-    cards = [c.title for c in decks]
-    shadows = [c.name for c in ef.CHARACTERS if c.alleg == C.Alleg.Shadow]
-    hunters = [c.name for c in ef.CHARACTERS if c.alleg == C.Alleg.Hunter]
-    neutrals = [c.name for c in ef.CHARACTERS if c.alleg == C.Alleg.Neutral]
-    areas = [a.name for a in ef.AREAS]
+
+def color_format(str, args, gc):
 
     # assign colors
     colors = [C.TEXT_COLORS['server']]
     for n in args:
-        if gc:
-            p = [p for p in gc.players if p.user_id == n]
         if isinstance(n, int):
             colors.append(C.TEXT_COLORS['number'])
-        elif n in cards:
-            card_type = [c for c in decks if c.title == n][0].color.name
-            card_color = 'Green' if card_type == 'Hermit' else card_type
-            colors.append(C.TEXT_COLORS[card_color])
-        elif n == 'a Hermit Card':
-            colors.append(C.TEXT_COLORS['Green'])
-        elif n in shadows or n == 'Shadow':
-            colors.append(C.TEXT_COLORS['shadow'])
-        elif n in hunters or n == 'Hunter':
-            colors.append(C.TEXT_COLORS['hunter'])
-        elif n in neutrals or n == 'Neutral':
-            colors.append(C.TEXT_COLORS['neutral'])
-        elif n in areas:
-            colors.append(C.TEXT_COLORS[n])
-        elif gc and p:
-            colors.append(p[0].color)
+        elif n in COLOR_INDEX:
+            colors.append(COLOR_INDEX[n])
+        elif gc and n in gc.colors:
+            colors.append(gc.colors[n])
         else:
             colors.append(C.TEXT_COLORS['server'])
         colors.append(C.TEXT_COLORS['server'])
 
     # assign strings
-    args += ['']
-    strings = sum([[s, args.pop(0)] for s in str.split('{}')], [])[:-1]
+    strings = []
+    for s, n in zip(str.split('{}'), list(args) + ['']):
+        strings += [s, n]
 
     # return tuple of strings and colors
-    return (strings, colors)
+    return (strings[:-1], colors)
+
+
+def diff_public_state(old, new):
+
+    # describe how to turn public state `old` into `new`: players are patched
+    # field by field (keyed by their index in the player list) and any other
+    # changed field is replaced whole. an empty patch means nothing changed
+    patch = {}
+    for key, value in new.items():
+        if key == 'players' and len(value) == len(old[key]):
+            players = {}
+            for i, (p_old, p_new) in enumerate(zip(old[key], value)):
+                fields = {k: v for k, v in p_new.items() if p_old.get(k) != v}
+                if fields:
+                    players[i] = fields
+            if players:
+                patch[key] = players
+        elif old.get(key) != value:
+            patch[key] = value
+    return patch
 
 # Helper functions for data retrieval
 
 
-def get_room_id(rooms, sid):
-    candidates = [r for r in rooms.keys() if sid in rooms[r]
-                  ['connections'].keys()]
-    if not candidates:
-        return None
-    else:
-        return candidates[0]
-
-
 def get_reserved_words():
-    ef = ElementFactory()
-    cards = ef.WHITE_DECK.cards + ef.BLACK_DECK.cards + ef.HERMIT_DECK.cards
-    reserved = [c.title for c in cards]
-    reserved += [ch.name for ch in ef.CHARACTERS]
-    reserved += [a.name for a in ef.AREAS]
+    reserved = [c.title for c in E.ALL_CARDS]
+    reserved += [ch.name for ch in E.CHARACTERS]
+    reserved += [a.name for a in E.AREAS]
     reserved += ["Shadow", "Hunter", "Neutral", "Decline"]
     return reserved
 
@@ -114,10 +127,11 @@ def answer_sequence(answers):
     return ask_function
 
 
-def fresh_gc_ef(n_players=random.randint(4, 8)):
+def fresh_gc_ef(n_players=random.randint(4, 8), seed=None):
     players = [Player("CPU_{}".format(
         i), 'unused', 'unused', True) for i in range(1, n_players + 1)]
-    ef = ElementFactory()
+    rng = random.Random(seed)
+    ef = ElementFactory(rng)
 
     gc = GameContext(
         players=players,
@@ -126,10 +140,11 @@ def fresh_gc_ef(n_players=random.randint(4, 8)):
         white_cards=ef.WHITE_DECK,
         hermit_cards=ef.HERMIT_DECK,
         areas=ef.AREAS,
-        ask_h=lambda x, y, z: {'value': random.choice(y['options'])},
+        ask_h=lambda x, y, z: {'value': rng.choice(y['options'])},
         tell_h=lambda x, y, *z: 0,
         show_h=lambda x, *y: 0,
-        update_h=lambda: 0
+        update_h=lambda: 0,
+        rng=rng
     )
     return (gc, ef)
 
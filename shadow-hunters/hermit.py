@@ -18,6 +18,7 @@ class HermitEffect():
         self.eq_opt = eq_opt
 
         # How much damage should the target receive or heal?
+        self.dmg = dmg
         self.damage_to = lambda t: -1 if dmg > 0 and not t.damage else dmg
 
         # Does the test check the target's max hp, rather than allegience?
@@ -0,0 +1,85 @@
+import os
+import sys
+import types
+from gc import get_referents
+
+# lifecycle.py
+# Implements the RoomLifecycle, which decides when a server's rooms are
+# reclaimed, and accounts for the memory they use.
+#
+# A room is reclaimed once its game has been over for FINISHED_TTL seconds
+# (e.g. spectators stayed connected after the end), or once nothing has
+# happened in it for IDLE_TTL seconds (e.g. a disconnect was missed, so the
+# room never emptied). Activity is any socket event from the room, or any
+# ask of its game. The front end sweeps every shard every SWEEP_INTERVAL
+# seconds (see RoomServer.sweep).
+
+IDLE_TTL = float(os.getenv('IDLE_TTL', 3600))
+FINISHED_TTL = float(os.getenv('FINISHED_TTL', 600))
+SWEEP_INTERVAL = float(os.getenv('SWEEP_INTERVAL', 60))
+
+# the states a room can be in
+STATES = ('lobby', 'playing', 'finished')
+
+# objects that aren't followed when sizing a room: code and classes are
+# shared by every room, and functions and frames (e.g. the game's handlers,
+# which close over the server) lead out of the room
+NOT_FOLLOWED = (type, types.ModuleType, types.FunctionType, types.MethodType,
+                types.BuiltinFunctionType, types.CodeType, types.FrameType)
+
+
+def approximate_size(root):
+    """Approximate bytes used by the objects reachable from `root`, each
+    counted once."""
+
+    seen = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, NOT_FOLLOWED):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(get_referents(obj))
+    return total
+
+
+class RoomLifecycle:
+    """
+    Classifies rooms (see registry.RoomRegistry for their fields) by state,
+    and picks the ones to reclaim: rooms whose game has been over for
+    `finished_ttl` seconds, and rooms that have been idle for `idle_ttl`
+    seconds, whatever their state. Times are taken from the registry's
+    clock.
+    """
+
+    def __init__(self, idle_ttl=IDLE_TTL, finished_ttl=FINISHED_TTL):
+        self.idle_ttl = idle_ttl
+        self.finished_ttl = finished_ttl
+
+    def state(self, room):
+        if room['finished'] is not None:
+            return 'finished'
+        if room['status'] == 'GAME':
+            return 'playing'
+        return 'lobby'
+
+    def expired(self, room, now):
+        # Returns why the room should be reclaimed, or None to keep it
+        if room['finished'] is not None and \
+                now - room['finished'] >= self.finished_ttl:
+            return 'finished'
+        if now - room['active'] >= self.idle_ttl:
+            return 'idle'
+        return None
+
+    def report(self, rooms):
+        # Returns the number of rooms in each state, and their size in bytes
+        # as of the last sweep
+        report = {state: {'rooms': 0, 'bytes': 0} for state in STATES}
+        for room in list(rooms.values()):
+            counts = report[self.state(room)]
+            counts['rooms'] += 1
+            counts['bytes'] += room['size'] or 0
+        return report
@@ -0,0 +1,365 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+import socketio
+
+# loadgen.py
+# Generates synthetic load on a game server: rooms of bot clients join
+# through /room, start games and answer every ask, while the tool records
+# client-side latencies and the server's CPU and memory use as the number of
+# rooms grows.
+#
+# Usage: python shadow-hunters/loadgen.py --rooms 200 --ramp 10 -i 5
+#        python shadow-hunters/loadgen.py --url http://host:5000 --rooms 50
+#
+# Without --url, a server (app.py) is started on --port with --server-python
+# and stopped at the end; its resource use is read from /proc, so it is only
+# reported on Linux. The clients need the python-socketio 4 client, which is
+# newer than the server's python-socketio, so the tool runs in a virtualenv
+# of its own, with requirements-loadtest.txt (see `make loadtest`).
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Stats:
+    """Latency samples by name, collected from every client's thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.counts = defaultdict(int)
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.samples[name].append(seconds)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counts[name] += n
+
+    def take(self):
+        # Returns and clears the samples recorded since the last call
+        with self.lock:
+            samples, self.samples = self.samples, defaultdict(list)
+            return samples
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+def post_room(url, room_id, name):
+    """Go through /room as a browser would. Returns True if the server let
+    the player into the room (rather than flashing an error)."""
+
+    form = urllib.parse.urlencode({'room_id': room_id, 'username': name})
+    request = urllib.request.Request(url + '/room', data=form.encode())
+    with urllib.request.urlopen(request) as response:
+        return urllib.parse.urlparse(response.geturl()).path == '/room'
+
+
+class Bot:
+    """
+    One client in a room. Every bot joins its room and answers each ask with
+    one of its options (after `think` seconds); the room's first bot starts
+    the game once `n_humans` bots have joined. Bots also ping the room with
+    chat messages to measure the time from emit to receive.
+
+    Records, in `stats`: ask_to_answer (from receiving an ask to answering
+    it), answer_to_ask (from answering to receiving the next ask, i.e. how
+    quickly the game gets back to the bot) and ping (from emitting a chat
+    message to receiving it back).
+    """
+
+    def __init__(self, url, room_id, name, stats, room, think=0.0,
+                 ping_interval=2.0):
+        self.url = url
+        self.room_id = room_id
+        self.name = name
+        self.stats = stats
+        self.room = room
+        self.think = think
+        self.ping_interval = ping_interval
+        self.answered_at = None
+        self.pings = {}
+        self.done = threading.Event()
+
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on('frame', self.on_frame)
+        self.sio.on('ask', self.on_ask)
+        self.sio.on('display', self.on_display)
+        self.sio.on('message', self.on_message)
+        self.sio.on('disconnect', self.done.set)
+
+    def run(self):
+        if not post_room(self.url, self.room_id, self.name):
+            self.stats.count('rejected')
+            return
+        self.sio.connect(self.url)
+        self.stats.count('connected')
+        self.sio.emit('join', {'room_id': self.room_id, 'name': self.name,
+                               'spectate': False, 'reconnect': False})
+
+        # The room's first bot starts the game once everyone has joined
+        with self.room['lock']:
+            self.room['joined'] += 1
+            if self.room['joined'] == self.room['n_humans']:
+                self.room['ready'].set()
+        if self.room['starter'] == self.name:
+            self.room['ready'].wait()
+            time.sleep(0.5)
+            self.sio.emit('start', {'n_players': self.room['n_players']})
+
+        # Ping the room until the game ends
+        n = 0
+        while not self.done.wait(self.ping_interval):
+            n += 1
+            ping = '{} ping {}'.format(self.name, n)
+            self.pings[ping] = time.perf_counter()
+            self.sio.emit('message', {'data': ping})
+        self.sio.disconnect()
+
+    def on_frame(self, frame):
+        # Bots don't pace frames: every event is handled on arrival
+        handlers = {'ask': self.on_ask, 'display': self.on_display,
+                    'message': self.on_message}
+        for event, data, at in frame['events']:
+            if event in handlers:
+                handlers[event](data)
+
+    def on_ask(self, data):
+        received = time.perf_counter()
+        if self.answered_at is not None:
+            self.stats.record('answer_to_ask', received - self.answered_at)
+        if self.think:
+            time.sleep(self.think)
+        options = [o for o in data['options'] if o != 'Decline']
+        self.answered_at = time.perf_counter()
+        self.stats.record('ask_to_answer', self.answered_at - received)
+        self.sio.emit('answer', {'value': (options or data['options'])[0]})
+
+    def on_display(self, data):
+        if data['type'] == 'win':
+            self.stats.count('games_finished')
+            self.done.set()
+
+    def on_message(self, data):
+        sent = self.pings.pop(data.get('data'), None)
+        if sent is not None:
+            self.stats.record('ping', time.perf_counter() - sent)
+
+
+def start_room(url, room_id, n_humans, n_players, stats, think):
+    """Start a room's bots, each on a thread of its own. Returns the
+    threads."""
+
+    names = ['bot{}'.format(i) for i in range(n_humans)]
+    room = {'lock': threading.Lock(), 'joined': 0, 'ready': threading.Event(),
+            'n_humans': n_humans, 'n_players': n_players,
+            'starter': names[0]}
+    threads = []
+    for name in names:
+        bot = Bot(url, room_id, name, stats, room, think)
+        thread = threading.Thread(target=bot.run, daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+class ServerProcess:
+    """A game server (app.py) started for the load test, with its worker
+    processes' resource use included."""
+
+    def __init__(self, port, shards=0, ai_sleep=None, socket_sleep=None,
+                 python=sys.executable):
+        env = dict(os.environ, PORT=str(port), DEBUG='0', SHARDS=str(shards))
+        if ai_sleep is not None:
+            env['AI_SLEEP'] = str(ai_sleep)
+        if socket_sleep is not None:
+            env['SOCKET_SLEEP'] = str(socket_sleep)
+        self.proc = subprocess.Popen(
+            [python, os.path.join('shadow-hunters', 'app.py')],
+            cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL)
+        self.url = 'http://127.0.0.1:{}'.format(port)
+
+    def wait_ready(self, timeout=30):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                urllib.request.urlopen(self.url + '/')
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError("Server didn't start at " + self.url)
+
+    def pids(self):
+        # The server and its descendants (shard workers)
+        parents = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open('/proc/{}/stat'.format(entry)) as f:
+                        fields = f.read().rsplit(')', 1)[1].split()
+                    parents[int(entry)] = int(fields[1])
+                except OSError:
+                    continue
+        pids = {self.proc.pid}
+        for _ in range(3):
+            pids |= {pid for pid, ppid in parents.items() if ppid in pids}
+        return pids
+
+    def resources(self):
+        """Returns the server's total CPU time (seconds) and resident memory
+        (bytes), or None where /proc isn't available."""
+
+        if not os.path.isdir('/proc'):
+            return None
+        ticks = os.sysconf('SC_CLK_TCK')
+        page = os.sysconf('SC_PAGE_SIZE')
+        cpu, rss = 0.0, 0
+        for pid in self.pids():
+            try:
+                with open('/proc/{}/stat'.format(pid)) as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+            except OSError:
+                continue
+            cpu += (int(fields[11]) + int(fields[12])) / ticks
+            rss += int(fields[21]) * page
+        return cpu, rss
+
+    def stop(self):
+        self.proc.terminate()
+        self.proc.wait()
+
+
+def run(url, n_rooms, n_humans, n_players, ramp, interval, stats,
+        think=0.0, server=None, timeout=600):
+    """Start `ramp` rooms every `interval` seconds until `n_rooms` have
+    started, and report on every interval until every game has finished
+    (or `timeout` passed). Yields one report per interval."""
+
+    start = time.time()
+    threads = []
+    started = 0
+    last = (time.time(), server.resources() if server else None)
+    while time.time() - start < timeout:
+        for _ in range(min(ramp, n_rooms - started)):
+            room_id = 'load{}'.format(started)
+            threads += start_room(url, room_id, n_humans, n_players, stats,
+                                  think)
+            started += 1
+        time.sleep(interval)
+
+        report = {
+            'elapsed': time.time() - start,
+            'rooms_started': started,
+            'games_finished': stats.counts['games_finished'] // n_humans,
+            'clients': sum(t.is_alive() for t in threads),
+            'rejected': stats.counts['rejected']
+        }
+        for name, samples in stats.take().items():
+            report[name] = {'n': len(samples),
+                            'p50': percentile(samples, 50),
+                            'p99': percentile(samples, 99)}
+
+        # CPU use over the interval, as a share of one core
+        now = (time.time(), server.resources() if server else None)
+        if now[1] and last[1]:
+            report['server_cpu'] = (now[1][0] - last[1][0]) / \
+                (now[0] - last[0])
+            report['server_rss_mb'] = now[1][1] / 2 ** 20
+        last = now
+        yield report
+
+        if started == n_rooms and report['clients'] == 0:
+            return
+
+
+def format_report(report):
+    line = "{:>6.1f}s rooms {:>4} done {:>4} clients {:>4}".format(
+        report['elapsed'], report['rooms_started'], report['games_finished'],
+        report['clients'])
+    if 'server_cpu' in report:
+        line += " cpu {:>4.0%} rss {:>6.1f}MB".format(
+            report['server_cpu'], report['server_rss_mb'])
+    for name in ('ping', 'answer_to_ask', 'ask_to_answer'):
+        if name in report:
+            line += " {} p50 {:.0f}ms p99 {:.0f}ms".format(
+                name, report[name]['p50'] * 1000,
+                report[name]['p99'] * 1000)
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate socket.io load on a Shadow Hunters server.")
+    parser.add_argument('--url', default=None,
+                        help="server to load (default: start one)")
+    parser.add_argument('--port', type=int, default=5050,
+                        help="port of the server started without --url")
+    parser.add_argument('--server-python', default=sys.executable,
+                        help="Python to start the server with (default: "
+                        "this one)")
+    parser.add_argument('--shards', type=int, default=0,
+                        help="worker processes of the started server")
+    parser.add_argument('--ai-sleep', type=float, default=None,
+                        help="AI_SLEEP of the started server")
+    parser.add_argument('--socket-sleep', type=float, default=None,
+                        help="SOCKET_SLEEP of the started server")
+    parser.add_argument('-r', '--rooms', type=int, default=20,
+                        help="rooms to start in total")
+    parser.add_argument('--ramp', type=int, default=5,
+                        help="rooms to start per interval")
+    parser.add_argument('-i', '--interval', type=float, default=5.0,
+                        help="seconds between reports")
+    parser.add_argument('--humans', type=int, default=1,
+                        help="bot clients per room")
+    parser.add_argument('-p', '--players', type=int, default=5,
+                        choices=range(4, 9), help="players per game")
+    parser.add_argument('--think', type=float, default=0.0,
+                        help="seconds each bot takes to answer an ask")
+    parser.add_argument('--timeout', type=float, default=600,
+                        help="seconds to run for at most")
+    parser.add_argument('--json', metavar='PATH',
+                        help="save every report to a JSON file")
+    args = parser.parse_args(argv)
+    if not 1 <= args.humans <= args.players:
+        parser.error("--humans must be between 1 and --players")
+
+    server = None
+    url = args.url
+    if not url:
+        server = ServerProcess(args.port, args.shards, args.ai_sleep,
+                               args.socket_sleep, args.server_python)
+        server.wait_ready()
+        url = server.url
+
+    reports = []
+    stats = Stats()
+    try:
+        for report in run(url, args.rooms, args.humans, args.players,
+                          args.ramp, args.interval, stats, args.think,
+                          server, args.timeout):
+            print(format_report(report), flush=True)
+            reports.append(report)
+    finally:
+        if server:
+            server.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import bisect
+
+# metrics.py
+# Implements counters, gauges and histograms, and renders them in the
+# Prometheus text exposition format.
+#
+# Metrics are collected into families, which are plain data (so that worker
+# processes can send theirs to the front end): a family is a (name, type,
+# help, samples) tuple, and each sample is a (suffix, labels, value) tuple.
+
+# upper bounds of histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30,
+                   60, 300)
+
+
+class Metric:
+    """
+    A metric family, holding one value per set of labels. Labels are passed
+    as keyword arguments, and every series of a metric should use the same
+    label names.
+    """
+
+    type = 'untyped'
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.series = {}
+
+    def _key(self, labels):
+        return tuple(sorted(labels.items()))
+
+    def remove(self, **labels):
+        # Drop every series whose labels include `labels`
+        items = set(labels.items())
+        self.series = {k: v for k, v in self.series.items()
+                       if not items <= set(k)}
+
+    def samples(self):
+        return [('', dict(k), v) for k, v in sorted(self.series.items())]
+
+    def collect(self):
+        return (self.name, self.type, self.help, self.samples())
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.series[key] = self.series.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        self.series[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """
+    Counts observations into cumulative buckets by upper bound, as well as
+    their count and sum.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        # Each series is [count per bucket (the last one is +Inf), sum]
+        key = self._key(labels)
+        if key not in self.series:
+            self.series[key] = [0] * (len(self.buckets) + 1) + [0]
+        series = self.series[key]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        samples = []
+        bounds = [repr(float(b)) for b in self.buckets] + ['+Inf']
+        for key, series in sorted(self.series.items()):
+            labels = dict(key)
+            total = 0
+            for bound, count in zip(bounds, series):
+                total += count
+                samples.append(('_bucket', dict(labels, le=bound), total))
+            samples.append(('_count', labels, total))
+            samples.append(('_sum', labels, series[-1]))
+        return samples
+
+
+def label(families, **labels):
+    """Add `labels` to every sample of `families` (e.g. the shard they were
+    collected from)."""
+
+    return [(name, type, help, [(suffix, dict(l, **labels), value)
+                                for suffix, l, value in samples])
+            for name, type, help, samples in families]
+
+
+def render(families):
+    """Render families in the Prometheus text format. Families with the same
+    name (e.g. from different shards) are rendered as one."""
+
+    merged = {}
+    for name, type, help, samples in families:
+        if name not in merged:
+            merged[name] = (type, help, [])
+        merged[name][2].extend(samples)
+
+    lines = []
+    for name, (type, help, samples) in merged.items():
+        lines.append("# HELP {} {}".format(name, help))
+        lines.append("# TYPE {} {}".format(name, type))
+        for suffix, labels, value in samples:
+            lines.append("{}{}{} {}".format(
+                name, suffix, _format_labels(labels), _format_value(value)))
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for k, v in sorted(labels.items()):
+        v = str(v).replace('\\', r'\\').replace('"', r'\"')
+        pairs.append('{}="{}"'.format(k, v.replace('\n', r'\n')))
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
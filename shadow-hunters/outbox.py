@@ -0,0 +1,51 @@
+import time
+
+# outbox.py
+# Implements the Outbox, which queues a room's outbound events during a game.
+
+
+class Outbox:
+    """
+    Outbound events of one room, queued while its game runs and sent in
+    frames whenever the room's server flushes it. Instead of the server
+    sleeping after every event to pace the frontend, each event is stamped
+    with the time it should be displayed at: paced events are spaced `pace`
+    seconds apart, and clients play frames out on that schedule.
+
+    Coalesced events replace any queued event of the same kind and target,
+    e.g. only the latest of several queued updates is sent.
+    """
+
+    def __init__(self, pace, clock=time.monotonic):
+        self.pace = pace
+        self.clock = clock
+        self.pending = []
+        self.display_at = 0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def push(self, event, data, to, paced=True, coalesce=False):
+        # Stamp the event with its display time, after every queued event
+        at = max(self.clock(), self.display_at)
+        if paced:
+            self.display_at = at + self.pace
+        if coalesce:
+            self.pending = [e for e in self.pending
+                            if (e[0], e[2]) != (event, to)]
+        self.pending.append((event, data, to, at))
+
+    def drain(self):
+        # Returns the queued (event, data, to, at) entries, oldest first
+        pending, self.pending = self.pending, []
+        return pending
+
+    def frames(self, entries):
+        # Group entries into one frame per target, keeping their order.
+        # `sent` lets clients map display times onto their own clocks
+        sent = self.clock()
+        frames = {}
+        for event, data, to, at in entries:
+            frame = frames.setdefault(to, {'sent': sent, 'events': []})
+            frame['events'].append([event, data, at])
+        return frames
@@ -4,10 +4,67 @@ import constants as C
 import concurrency as R
 from collections import defaultdict
 from operator import add, sub
+import time
+
+
+def _notifying(method):
+    # Wraps a list method so that calling it tells the list's owner
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.owner.equipmentChanged()
+        return result
+    return wrapper
+
+
+class Equipment(list):
+    """A player's equipment list, which tells the player whenever it
+    changes"""
+
+    def __init__(self, owner, cards=()):
+        super().__init__(cards)
+        self.owner = owner
+
+    append = _notifying(list.append)
+    extend = _notifying(list.extend)
+    insert = _notifying(list.insert)
+    pop = _notifying(list.pop)
+    remove = _notifying(list.remove)
+    clear = _notifying(list.clear)
+    sort = _notifying(list.sort)
+    reverse = _notifying(list.reverse)
+    __iadd__ = _notifying(list.__iadd__)
+    __setitem__ = _notifying(list.__setitem__)
+    __delitem__ = _notifying(list.__delitem__)
+
+
+def _compose(uses, is_attack):
+    # Composes the uses of a player's equipment into one modifier
+    if not uses:
+        return (lambda successful, amount: amount)
+
+    def modifier(successful, amount):
+        for use in uses:
+            amount = use(is_attack, successful, amount)
+        return amount
+    return modifier
 
 
 class Player:
+
+    # Fields included in dump(). Assigning to any of them invalidates the
+    # cached dumps (as does any change to the equipment list)
+    DUMP_FIELDS = frozenset([
+        'user_id', 'socket_id', 'color', 'state', 'equipment', 'damage',
+        'character', 'location', 'special_active', 'ai', 'delexicalizations'
+    ])
+
+    # Fields the game context indexes players by, and the game context method
+    # that re-indexes the players when one of them is assigned
+    INDEXED_FIELDS = {'state': 'indexPlayers', 'location': 'indexLocations',
+                      'character': 'indexCharacters'}
+
     def __init__(self, user_id, socket_id, color, ai):
+        self._dumps = None
         self.user_id = user_id
         self.socket_id = socket_id
         self.color = color
@@ -23,6 +80,45 @@ class Player:
         self.delexicalizations = dict()
         self.resetModifiers()
 
+    def __setattr__(self, name, value):
+        if name in Player.DUMP_FIELDS:
+            self.__dict__['_dumps'] = None
+
+        # Equipment is kept in an Equipment list, which reports changes
+        if name == 'equipment':
+            if not (isinstance(value, Equipment) and value.owner is self):
+                value = Equipment(self, value)
+            self.__dict__[name] = value
+            self.equipmentChanged()
+            return
+        self.__dict__[name] = value
+
+        # Keep the game context's live/dead and occupant indexes current
+        gc = self.__dict__.get('gc')
+        if gc and name in Player.INDEXED_FIELDS:
+            getattr(gc, Player.INDEXED_FIELDS[name])()
+
+    def equipmentChanged(self):
+        # Drop the dumps and compiled equipment effects, and have the game
+        # context re-check the win conditions
+        self.__dict__['_dumps'] = None
+        self.__dict__['_effects'] = None
+        gc = self.__dict__.get('gc')
+        if gc:
+            gc.win_check_due = True
+
+    def _equipmentEffects(self):
+        # Compile the titles of the player's equipment, and the attack and
+        # defence modifiers composed from its uses, until equipment changes
+        if self._effects is None:
+            uses = [eq.use for eq in self.equipment if eq.use]
+            self._effects = (
+                frozenset(eq.title for eq in self.equipment),
+                _compose(uses, is_attack=True),
+                _compose(uses, is_attack=False)
+            )
+        return self._effects
+
     def setCharacter(self, character):
         self.character = character
 
@@ -73,7 +169,8 @@ class Player:
 
         # Before turn check for special ability
         if self.special_active:
-            self.character.special(self.gc, self, turn_pos='start')
+            self.runPhase('special_start', self.character.special, self.gc,
+                          self, turn_pos='start')
 
         # If anything causes the current player to die or someone to win,
         # the turn ends early
@@ -83,20 +180,33 @@ class Player:
         if abortTurn():
             return
 
-        self.movementPhase()
-        self.areaPhase()
+        self.runPhase('movement', self.movementPhase)
+        self.runPhase('area', self.areaPhase)
 
         if abortTurn():
             return
 
-        self.attackPhase()
+        self.runPhase('attack', self.attackPhase)
 
         if abortTurn():
             return
 
         # After turn check for special ability
         if self.special_active:
-            self.character.special(self.gc, self, turn_pos='end')
+            self.runPhase('special_end', self.character.special, self.gc,
+                          self, turn_pos='end')
+
+    def runPhase(self, phase, fn, *args, **kwargs):
+
+        # Run a phase of the turn, reporting how long it took to the game's
+        # phase handler (if any, as of the start of the phase)
+        phase_h = self.gc.phase_h
+        if not phase_h:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        phase_h(phase, time.perf_counter() - start)
+        return result
 
     def movementPhase(self):
 
@@ -164,15 +274,13 @@ class Player:
 
         if answer != "Decline":
             # Get attackable players
-            live_players = self.gc.getLivePlayers(lambda p: p.location)
-            targets = [p for p in live_players if (
-                p.location.zone == self.location.zone and p != self)]
+            zone = self.location.zone
+            targets = [p for p in self.gc.getPlayersInZone(zone) if p != self]
 
             if self.hasEquipment("Handgun"):
                 self.gc.tell_h("{}'s {} reverses their attack range.", [
                                self.user_id, "Handgun"])
-                targets = [p for p in live_players if (
-                    p.location.zone != self.location.zone and p != self)]
+                targets = self.gc.getPlayersOutsideZone(zone)
 
             # If player has Masamune, can't decline unless there are no options
             opts = [t.user_id for t in targets]
@@ -186,9 +294,7 @@ class Player:
 
                 # Get target
                 target_name = answer
-                target_Player = self.gc.getLivePlayers(
-                    lambda x: x.user_id == target_name
-                )[0]
+                target_Player = self.gc.getPlayer(target_name)
                 self.gc.tell_h(
                     "{} is attacking {}!",
                     [self.user_id, target_name]
@@ -288,14 +394,11 @@ class Player:
 
     def areaRoll(self):
 
-        # Valid areas
-        valid = self.gc.getAreas()
-        if self.location:
-            valid.remove(self.location.name)
-
-        # Continue re-rolling until a valid area is rolled
+        # Continue re-rolling until a valid area (any area other than the
+        # current one) is rolled
         roll = self.rollDice()
-        while not (roll == 7 or self.gc.getAreaFromRoll(roll).name in valid):
+        while not (roll == 7 or
+                   self.gc.getAreaFromRoll(roll) is not self.location):
             re = "The {} must be re-rolled because {} is already at {}..."
             self.gc.tell_h(re, [roll, self.user_id, self.location.name])
             roll = self.rollDice()
@@ -362,8 +465,7 @@ class Player:
         target = self.gc.ask_h('select', data, self.user_id)['value']
 
         # Return the chosen player
-        target_Player = [p for p in self.gc.getLivePlayers()
-                         if p.user_id == target][0]
+        target_Player = self.gc.getPlayer(target)
         self.gc.tell_h("{} chose {}!", [self.user_id, target])
         return target_Player
 
@@ -392,16 +494,13 @@ class Player:
         self.gc.update_h()
 
     def hasEquipment(self, equipment_name):
-        return equipment_name in [eq.title for eq in self.equipment]
+        return equipment_name in self._equipmentEffects()[0]
 
     def attack(self, other, amount, dryrun=False):
 
-        # Compose equipment functions
-        is_attack = True
+        # Apply equipment effects
         successful = (amount != 0)
-        for eq in self.equipment:
-            if eq.use:
-                amount = eq.use(is_attack, successful, amount)
+        amount = self._equipmentEffects()[1](successful, amount)
 
         # Check for spear of longinus
         has_spear = self.hasEquipment("Spear of Longinus")
@@ -432,12 +531,9 @@ class Player:
                                self.user_id, "Guardian Angel"])
             return 0
 
-        # Compose equipment functions
-        is_attack = False
+        # Apply equipment effects
         successful = False
-        for eq in self.equipment:
-            if eq.use:
-                amount = eq.use(is_attack, successful, amount)
+        amount = self._equipmentEffects()[2](successful, amount)
 
         # Return damage dealt
         dealt = amount
@@ -519,8 +615,7 @@ class Player:
         # Equipment stealing if dead player has equipment
         if self.equipment and self != attacker:
 
-            has_silver_rosary = ("Silver Rosary" in [
-                                 e.title for e in attacker.equipment])
+            has_silver_rosary = attacker.hasEquipment("Silver Rosary")
             has_steal_all_mod = attacker.modifiers['steal_all_on_kill']
 
             if has_silver_rosary or has_steal_all_mod:
@@ -577,17 +672,36 @@ class Player:
         self.location = location
         self.gc.update_h()
 
+    def _cachedDumps(self):
+
+        # Rebuild the dumps only if a dumped field was assigned or the
+        # equipment changed since they were last built. Dumps are replaced,
+        # never modified, so earlier dumps remain valid snapshots
+        if self._dumps is None:
+            private = {
+                'user_id': self.user_id,
+                'socket_id': self.socket_id,
+                'color': self.color,
+                'state': self.state.value,
+                'equipment': [eq.dump() for eq in self.equipment],
+                'damage': self.damage,
+                'character': self.character.dump() if self.character else {},
+                'location': self.location.dump() if self.location else {},
+                'special_active': self.special_active,
+                'ai': self.ai,
+                'delexicalizations': self.delexicalizations
+            }
+
+            # Hide character information if player hasn't revealed themselves
+            public = private
+            if self.state == C.PlayerState.Hidden:
+                public = dict(private, character={})
+
+            self._dumps = (private, public)
+        return self._dumps
+
     def dump(self):
-        return {
-            'user_id': self.user_id,
-            'socket_id': self.socket_id,
-            'color': self.color,
-            'state': self.state.value,
-            'equipment': [eq.dump() for eq in self.equipment],
-            'damage': self.damage,
-            'character': self.character.dump() if self.character else {},
-            'location': self.location.dump() if self.location else {},
-            'special_active': self.special_active,
-            'ai': self.ai,
-            'delexicalizations': self.delexicalizations
-        }
+        return self._cachedDumps()[0]
+
+    def dumpPublic(self):
+        return self._cachedDumps()[1]
@@ -0,0 +1,104 @@
+import time
+from threading import Lock
+
+# registry.py
+# Implements the RoomRegistry, which holds every room on the server.
+
+
+class RoomRegistry(dict):
+    """
+    Rooms indexed by room_id. Each room has a status, gc, connections, and
+    reconnections field: status is LOBBY or GAME, gc is None if status is
+    LOBBY (otherwise a GameContext), connections maps socket_id => username,
+    and reconnections holds the usernames that may rejoin a game. Once a game
+    starts, public_state is the last public state sent to the room, seq
+    counts the updates sent since the game started, and outbox queues the
+    events the game sends to the room (see outbox.Outbox).
+
+    For the room's lifecycle (see lifecycle.py), active is the time (by
+    `clock`) of the room's last activity, finished the time its game ended
+    (or None), and size the room's approximate size in bytes as of the last
+    sweep (or None).
+
+    The registry also keeps a socket_id => room_id index and one lock per
+    room, so that events in different rooms never wait on each other. The
+    locks are plain thread locks, which block the whole process under green
+    threads, so nothing that can yield (such as an io call) may be done
+    while holding one.
+    Connections must be added and removed through `connect` (or `enter`) and
+    `disconnect` to keep the index current.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        super().__init__()
+        self.clock = clock
+        self.sid_index = {}
+        self.locks = {}
+
+        # Guards the registry itself (rooms, locks, and the socket index)
+        self.registry_lock = Lock()
+
+    def _create(self, room_id):
+        # The caller must hold registry_lock
+        if room_id not in self:
+            self[room_id] = {'status': 'LOBBY', 'gc': None,
+                             'connections': {}, 'reconnections': {},
+                             'seq': 0, 'public_state': None,
+                             'outbox': None, 'active': self.clock(),
+                             'finished': None, 'size': None}
+            self.locks[room_id] = Lock()
+        return self[room_id]
+
+    def create(self, room_id):
+        with self.registry_lock:
+            return self._create(room_id)
+
+    def close(self, room_id):
+        with self.registry_lock:
+            room = self.pop(room_id, None)
+            self.locks.pop(room_id, None)
+            if room:
+                for sid in room['connections']:
+                    self.sid_index.pop(sid, None)
+            return room
+
+    def connect(self, room_id, sid, name):
+        with self.registry_lock:
+            self[room_id]['connections'][sid] = name
+            self.sid_index[sid] = room_id
+
+    def enter(self, room_id, sid, name, create=True):
+        # Connect a socket to a room in one step, creating the room first if
+        # `create`, so that the room can't close in between. Returns the
+        # room, or None if it doesn't exist and wasn't created
+        with self.registry_lock:
+            if room_id not in self:
+                if not create:
+                    return None
+                self._create(room_id)
+            self[room_id]['connections'][sid] = name
+            self.sid_index[sid] = room_id
+            return self[room_id]
+
+    def disconnect(self, sid):
+        # Returns the name of the disconnected socket, or None if the socket
+        # was not in any room (e.g. a duplicate disconnect)
+        with self.registry_lock:
+            room_id = self.sid_index.pop(sid, None)
+            if room_id not in self:
+                return None
+            return self[room_id]['connections'].pop(sid, None)
+
+    def touch(self, room_id):
+        # Note activity in a room (if it still exists)
+        room = self.get(room_id)
+        if room:
+            room['active'] = self.clock()
+
+    def get_room_id(self, sid):
+        return self.sid_index.get(sid)
+
+    def lock(self, room_id):
+        # Rooms that don't exist have nothing to guard, so they get a
+        # throwaway lock rather than a registry entry
+        return self.locks.get(room_id) or Lock()
@@ -0,0 +1,721 @@
+import collections
+import random
+import os
+import html
+import time
+
+from game_context import GameContext
+from elements import ElementFactory
+from player import Player
+
+from helpers import color_format, diff_public_state
+from lifecycle import RoomLifecycle, approximate_size
+from metrics import Counter, Gauge, Histogram
+from outbox import Outbox
+from registry import RoomRegistry
+import constants as C
+import concurrency as R
+
+# room_server.py
+# Implements a RoomServer, which hosts rooms and plays their games. The
+# server never touches sockets itself: it talks to clients through `io`, which
+# emits events, sleeps, and manages socket.io rooms on its behalf (see app.py
+# for the front end's io, and sharding.py for a worker process's io).
+
+# display time between socket emissions (clients pace the frontend by it),
+# and sleep time before CPU players act
+SOCKET_SLEEP = float(os.getenv('SOCKET_SLEEP', 0.25))
+AI_SLEEP = float(os.getenv('AI_SLEEP', 2.0))
+
+# number of finished games whose results are kept
+RESULTS_KEPT = 1000
+
+
+class RoomServer:
+    """
+    Hosts rooms (see registry.RoomRegistry for their fields) and handles
+    their socket events. `io` must provide emit(event, data, room),
+    sleep(seconds), enter_room(sid, room), disconnect(sid), and
+    create_queue(). A socket.io room empties as its sockets disconnect, so
+    rooms are never closed through `io`: closing one after its room lock is
+    released could remove a player who just joined a new room of the same
+    name.
+
+    The results of the most recent games are kept in `results`, including
+    games whose rooms were abandoned (which are fast-forwarded to the end).
+    The server also measures its games (see collect_metrics), and reclaims
+    the rooms it no longer needs whenever it is swept (see sweep).
+    """
+
+    def __init__(self, io):
+        self.io = io
+        self.rooms = RoomRegistry()
+        self.results = collections.deque(maxlen=RESULTS_KEPT)
+        self.lifecycle = RoomLifecycle()
+
+        # Instrumentation
+        self.handler_calls = Counter(
+            'shadowhunters_handler_calls_total',
+            "Calls of each game handler, by room")
+        self.phase_seconds = Histogram(
+            'shadowhunters_turn_phase_seconds',
+            "Time taken by each phase of a turn")
+        self.ask_seconds = Histogram(
+            'shadowhunters_ask_wait_seconds',
+            "Time each ask waited for an answer, by human or AI player")
+        self.rooms_reclaimed = Counter(
+            'shadowhunters_rooms_reclaimed_total',
+            "Rooms reclaimed by sweeps, by reason (finished or idle)")
+
+    def handle(self, event, sid, data=None):
+        # Dispatch a socket event from connection `sid`, noting activity in
+        # its room
+        handler = getattr(self, 'on_' + event)
+        if event == 'join':
+            self.rooms.touch(data['room_id'])
+        else:
+            self.rooms.touch(self.rooms.get_room_id(sid))
+        if data is None:
+            return handler(sid)
+        return handler(sid, data)
+
+    # INSTRUMENTATION
+
+    def counted(self, room_id, handler, fn):
+
+        # Wrap a game handler so that its calls are counted per room
+        def wrapper(*args):
+            self.handler_calls.inc(room=room_id, handler=handler)
+            return fn(*args)
+        return wrapper
+
+    def collect_metrics(self):
+
+        # Returns the server's metric families (see metrics.py), including
+        # gauges of its rooms, connections and games running, and of its
+        # rooms by state (see lifecycle.py)
+        rooms = list(self.rooms.values())
+        gauges = [
+            ('shadowhunters_rooms', "Open rooms", len(rooms)),
+            ('shadowhunters_connections', "Connections in rooms",
+             sum(len(r['connections']) for r in rooms)),
+            ('shadowhunters_games_running', "Games in progress",
+             sum(1 for r in rooms if r['gc'] and not r['gc'].game_over))
+        ]
+        families = []
+        for name, help, value in gauges:
+            gauge = Gauge(name, help)
+            gauge.set(value)
+            families.append(gauge.collect())
+        by_state = Gauge('shadowhunters_rooms_by_state',
+                         "Open rooms, by state")
+        room_bytes = Gauge('shadowhunters_room_bytes',
+                           "Approximate size of rooms as of the last sweep, "
+                           "by state")
+        for state, counts in self.lifecycle.report(self.rooms).items():
+            by_state.set(counts['rooms'], state=state)
+            room_bytes.set(counts['bytes'], state=state)
+        families += [by_state.collect(), room_bytes.collect()]
+        for metric in (self.handler_calls, self.phase_seconds,
+                       self.ask_seconds, self.rooms_reclaimed):
+            families.append(metric.collect())
+        return families
+
+    # ROOM LOOKUPS
+
+    def room_context(self, room_id, username):
+
+        # Returns ('flash', message) if username can't enter the room, or
+        # ('render', context) with the context to render the room with
+        rooms = self.rooms
+
+        # check for username taken
+        room_lock = rooms.lock(room_id)
+        room_lock.acquire()
+        if (room_id in rooms):
+            if username in rooms[room_id]['connections'].values():
+                room_lock.release()
+                return ('flash', "Someone in the room has taken your name")
+
+        # check for game already in progress
+        if (room_id in rooms) and rooms[room_id]['status'] == 'GAME':
+            public_state, private_state = rooms[room_id]['gc'].dump()
+            context = {
+                'name': username,
+                'room_id': room_id,
+                'spectate': True,
+                'reconnect': False,
+                'gc_data': {'public': public_state,
+                            'seq': rooms[room_id]['seq']}
+            }
+
+            # Reconnect to game
+            if username in rooms[room_id]['reconnections']:
+                context['spectate'] = False
+                context['reconnect'] = True
+                context['gc_data']['private'] = [
+                    p for p in private_state if p['user_id'] == username][0]
+            room_lock.release()
+            return ('render', context)
+        room_lock.release()
+
+        # send player to room
+        return ('render', {
+            'name': username,
+            'room_id': room_id,
+            'spectate': False,
+            'reconnect': False
+        })
+
+    # SOCKET EMITTERS
+
+    def socket_ask(self, form, data, user_id, room_id):
+        rooms = self.rooms
+
+        # Get player
+        room_lock = rooms.lock(room_id)
+        room_lock.acquire()
+        if room_id in rooms and rooms[room_id]['gc']:
+            player = rooms[room_id]['gc'].getPlayer(user_id)
+            rooms.touch(room_id)
+        else:
+            room_lock.release()
+            if 'Decline' in data['options'] and len(data['options']) > 1:
+                data['options'].remove('Decline')
+            return {'value': random.choice(data['options'])}
+        room_lock.release()
+
+        # If player is a CPU, use the player's piggyback agent to make a choice
+        start = time.perf_counter()
+        if player.ai:
+            self.flush(room_id)
+            self.io.sleep(AI_SLEEP)
+            answer = player.agent.choose_action(
+                data['options'], player=player, gc=player.gc
+            )
+            self.ask_seconds.observe(time.perf_counter() - start, player='ai')
+            return answer
+
+        # Otherwise, open a mailbox for this ask and emit it
+        sid = player.socket_id
+        mailbox = {
+            'sid': sid,
+            'options': data['options'],
+            'queue': self.io.create_queue()
+        }
+        player.gc.answer_bin[user_id] = mailbox
+        data['form'] = form
+        self.queue('ask', data, sid, room_id, paced=False)
+        self.flush(room_id)
+
+        # Block until on_answer delivers a valid answer or wake_ask interrupts
+        answer = mailbox['queue'].get()
+        self.ask_seconds.observe(time.perf_counter() - start, player='human')
+
+        # If a player swaps out for an AI (or reconnects) during an ask, the
+        # piggyback agent answers for them (right away if the room is gone)
+        if answer is None:
+            if room_id in rooms:
+                self.io.sleep(AI_SLEEP)
+            return player.agent.choose_action(
+                data['options'], player=player, gc=player.gc
+            )
+
+        # Return answer
+        return answer
+
+    def fast_ask(self, form, data, user_id, gc):
+
+        # Let the player's piggyback agent answer right away, yielding so
+        # that a fast-forwarded game doesn't hold up other rooms
+        self.io.sleep(0)
+        player = gc.getPlayer(user_id)
+        return player.agent.choose_action(
+            data['options'], player=player, gc=player.gc
+        )
+
+    def fast_forward(self, gc):
+
+        # Nobody is left to watch the room's game (everyone left, or the room
+        # was reclaimed), so hand every player to their piggyback agent and
+        # play the rest of the game unpaced and unseen
+        for p in gc.players:
+            p.ai = True
+            self.wake_ask(gc, p.user_id)
+        gc.ask_h = lambda x, y, z: self.fast_ask(x, y, z, gc)
+        gc.tell_h = lambda x, y, *z: 0
+        gc.show_h = lambda x, *y: 0
+        gc.update_h = lambda: 0
+        gc.phase_h = None
+
+    def record(self, room_id, gc):
+
+        # Keep the result of a finished game. A game whose room closed (or
+        # was replaced) before the end was fast-forwarded
+        room = self.rooms.get(room_id)
+        if room and room['gc'] is gc:
+            room['finished'] = self.rooms.clock()
+        self.results.append({
+            'room_id': room_id,
+            'rounds': gc.round_count + 1,
+            'winners': [p.user_id for p in gc.winners],
+            'abandoned': not room or room['gc'] is not gc
+        })
+
+    def sweep(self):
+
+        # Reclaim the rooms whose time is up, and measure the others (yielding
+        # between rooms, so that a sweep doesn't hold up their games). Returns
+        # the lifecycle's report on the remaining rooms
+        now = self.rooms.clock()
+        for room_id in list(self.rooms):
+            room = self.rooms.get(room_id)
+            if not room:
+                continue
+            reason = self.lifecycle.expired(room, now)
+            if reason:
+                self.reclaim(room_id, reason)
+            else:
+                room['size'] = approximate_size(room)
+            self.io.sleep(0)
+        return self.lifecycle.report(self.rooms)
+
+    def reclaim(self, room_id, reason):
+
+        # Close a room whatever its state, fast-forwarding its game if it's
+        # still running, and disconnect whoever is left in it
+        rooms = self.rooms
+        room_lock = rooms.lock(room_id)
+        room_lock.acquire()
+        room = rooms.close(room_id)
+        if not room:
+            room_lock.release()
+            return
+        gc = room['gc']
+        if gc and not gc.game_over:
+            self.fast_forward(gc)
+        self.handler_calls.remove(room=room_id)
+        self.rooms_reclaimed.inc(reason=reason)
+        room_lock.release()
+
+        # Tell everyone why the room closed (one by one, since a new room of
+        # the same name may open in the meantime)
+        if reason == 'idle':
+            msg = 'This room has closed after {} minutes without activity.'
+            minutes = int(self.lifecycle.idle_ttl // 60)
+        else:
+            msg = 'This room has closed {} minutes after its game ended.'
+            minutes = int(self.lifecycle.finished_ttl // 60)
+        for sid in room['connections']:
+            self.socket_tell(msg, [minutes], None, room_id, client=(sid,))
+            self.io.disconnect(sid)
+
+    def wake_ask(self, gc, user_id):
+
+        # Interrupt a player's pending ask, if any, so that their piggyback
+        # agent answers it instead
+        mailbox = gc.answer_bin.pop(user_id, None)
+        if mailbox:
+            mailbox['queue'].put(None)
+
+    def queue(self, event, data, to, room_id, paced=True, coalesce=False):
+
+        # Queue an event in the room's outbox while it has a game, or emit it
+        # right away otherwise
+        room = self.rooms.get(room_id)
+        if room and room['outbox'] is not None:
+            room['outbox'].push(event, data, to, paced, coalesce)
+        else:
+            self.io.emit(event, data, to)
+
+    def flush(self, room_id):
+
+        # Send everything queued in the room's outbox, one frame per target
+        room = self.rooms.get(room_id)
+        if not room or not room['outbox']:
+            return
+        entries = []
+        for event, data, to, at in room['outbox'].drain():
+
+            # Updates are queued as whole public states, and only what changed
+            # since the last update sent to the room goes out
+            if event == 'update':
+                patch = diff_public_state(room['public_state'], data)
+                if not patch:
+                    continue
+
+                # Number each update so that clients can detect a missed one
+                # and resync
+                room['seq'] += 1
+                room['public_state'] = data
+                data = {'seq': room['seq'], 'patch': patch}
+            entries.append((event, data, to, at))
+
+        for to, frame in room['outbox'].frames(entries).items():
+            self.io.emit('frame', frame, to)
+
+    def socket_tell(self, str, args, gc, room_id, client=None):
+        if not client:
+            client = (room_id,)
+        data = color_format(str, args, gc)
+        packet = {'strings': data[0], 'colors': data[1]}
+        self.queue('message', packet, client[0], room_id)
+
+    def socket_show(self, data, gc, room_id, client=None):
+        assert data['type'] in ["die", "win", "reveal", "roll", "draw",
+                                "damage"]
+        if not client:
+            client = (room_id,)
+        self.queue('display', data, client[0], room_id)
+
+    def socket_update(self, data, room_id):
+
+        # Only the latest of several queued updates is sent
+        self.queue('update', data, room_id, room_id, coalesce=True)
+
+    # SOCKET RECEIVERS
+
+    def on_start(self, sid, json):
+        rooms = self.rooms
+
+        # Get room and players in it
+        room_id = rooms.get_room_id(sid)
+        room_lock = rooms.lock(room_id)
+        room_lock.acquire()
+        if not room_id:
+            room_lock.release()
+            return
+
+        people_in_room = rooms[room_id]['connections']
+        names_and_sids = [(people_in_room[x], x)
+                          for x in people_in_room.keys()]
+
+        # Check for false start
+        n_players = max(min(int(json['n_players']), 8), 4)
+        if len(names_and_sids) > n_players:
+            room_lock.release()
+            packet = {'field': n_players, 'actual': len(names_and_sids)}
+            self.io.emit('false_start', packet, sid)
+            return
+
+        # Initialize human and AI players
+        rgb = ['rgb(245,245,245)', 'rgb(100,100,100)', 'rgb(79,182,78)',
+               'rgb(62,99,171)', 'rgb(197,97,163)', 'rgb(219,62,62)',
+               'rgb(249,234,48)', 'rgb(239,136,43)']
+        human_players = [Player(n[0], n[1], rgb.pop(0), False)
+                         for n in names_and_sids]
+        ai_players = [Player("CPU_{}".format(i), str(i), rgb.pop(0), True)
+                      for i in range(1, n_players - len(human_players) + 1)]
+        players = human_players + ai_players
+
+        # Initialize game context with players, emission functions, and its
+        # own random stream
+        rng = random.Random()
+        ef = ElementFactory(rng)
+        gc = GameContext(
+            players=players,
+            characters=ef.CHARACTERS,
+            black_cards=ef.BLACK_DECK,
+            white_cards=ef.WHITE_DECK,
+            hermit_cards=ef.HERMIT_DECK,
+            areas=ef.AREAS,
+            ask_h=self.counted(room_id, 'ask', lambda x, y, z:
+                               self.socket_ask(x, y, z, room_id)),
+            tell_h=None,
+            show_h=None,
+            update_h=None,
+            rng=rng
+        )
+        gc.tell_h = self.counted(room_id, 'tell', lambda x, y, *z:
+                                 self.socket_tell(x, y, gc, room_id, z))
+        gc.show_h = self.counted(room_id, 'show', lambda x, *y:
+                                 self.socket_show(x, gc, room_id, y))
+        gc.update_h = self.counted(room_id, 'update', lambda:
+                                   self.socket_update(gc.dump()[0], room_id))
+        gc.phase_h = lambda phase, seconds: self.phase_seconds.observe(
+            seconds, phase=phase)
+
+        # Assign game to room
+        if rooms[room_id]['status'] == 'GAME':
+            room_lock.release()
+            return
+        rooms[room_id]['gc'] = gc
+        rooms[room_id]['status'] = 'GAME'
+        rooms[room_id]['outbox'] = Outbox(SOCKET_SLEEP)
+
+        # Updates are sent as patches against the state sent at game start
+        public_state, private_state = gc.dump()
+        rooms[room_id]['public_state'] = public_state
+        rooms[room_id]['seq'] = 0
+        room_lock.release()
+
+        # Send public and private game states to frontend
+        gc.tell_h("Loading game...", [])
+        for priv in private_state:
+            data = {
+                'public': public_state,
+                'private': priv,
+                'seq': 0
+            }
+            self.io.emit('game_start', data, priv['socket_id'])
+        self.io.sleep(1)
+        gc.tell_h("Started a game with players {}".format(
+            ", ".join(['{}'] * len(players))), [p.user_id for p in players])
+
+        # Initiate gameplay loop, and send whatever the game queued last
+        gc.play()
+        self.flush(room_id)
+        self.record(room_id, gc)
+
+    def on_reveal(self, sid):
+        rooms = self.rooms
+
+        # Get room
+        room_id = rooms.get_room_id(sid)
+        room_lock = rooms.lock(room_id)
+        room_lock.acquire()
+
+        # Make sure room and game still exist
+        if room_id and rooms[room_id]['gc']:
+            player = [p for p in rooms[room_id]
+                      ['gc'].players if p.socket_id == sid][0]
+        else:
+            room_lock.release()
+            return
+
+        # Reveal them (if they're alive and unrevealed)
+        room_lock.release()
+        R.reveal_lock.acquire()
+        if player.state == C.PlayerState.Hidden:
+            player.state = C.PlayerState.Revealed  # Guard
+            R.reveal_lock.release()
+            player.reveal()
+            self.flush(room_id)
+        else:
+            R.reveal_lock.release()
+
+    def on_special(self, sid):
+        rooms = self.rooms
+
+        # Get room
+        room_id = rooms.get_room_id(sid)
+        room_lock = rooms.lock(room_id)
+        room_lock.acquire()
+
+        # Make sure room and game still exist
+        if room_id and rooms[room_id]['gc']:
+            player = [p for p in rooms[room_id]
+                      ['gc'].players if p.socket_id == sid][0]
+        else:
+            room_lock.release()
+            return
+        room_lock.release()
+
+        # Use special
+        R.reveal_lock.acquire()
+        if player.state == C.PlayerState.Revealed and \
+                not player.special_active:
+            player.special_active = True  # Guard
+            R.reveal_lock.release()
+            msg = "You've activated your special ability."
+            msg += " It will take effect next time its use conditions are met."
+            player.gc.tell_h(msg, [], sid)
+            player.character.special(rooms[room_id]['gc'], player,
+                                     turn_pos='now')
+            rooms[room_id]['gc'].update_h()
+            self.flush(room_id)
+        else:
+            R.reveal_lock.release()
+
+    def on_resync(self, sid):
+        rooms = self.rooms
+
+        # Get room
+        room_id = rooms.get_room_id(sid)
+        room_lock = rooms.lock(room_id)
+        room_lock.acquire()
+        if not room_id or rooms[room_id]['status'] != 'GAME':
+            room_lock.release()
+            return
+
+        # Send the full public state to a client that missed an update
+        packet = {
+            'seq': rooms[room_id]['seq'],
+            'full': rooms[room_id]['public_state']
+        }
+        room_lock.release()
+        self.io.emit('update', packet, sid)
+
+    def on_answer(self, sid, json):
+        rooms = self.rooms
+
+        # Get room
+        room_id = rooms.get_room_id(sid)
+        room_lock = rooms.lock(room_id)
+        room_lock.acquire()
+        if not room_id or rooms[room_id]['status'] != 'GAME':
+            room_lock.release()
+            return
+
+        # Find the pending ask addressed to this connection, if any
+        name = rooms[room_id]['connections'][sid]
+        answer_bin = rooms[room_id]['gc'].answer_bin
+        mailbox = answer_bin.get(name)
+
+        # Validate answerer and answer, then deliver it to the waiting ask
+        if mailbox and mailbox['sid'] == sid and \
+                json.get('value') in mailbox['options']:
+            answer_bin.pop(name)
+            mailbox['queue'].put(json)
+        room_lock.release()
+
+    def on_message(self, sid, json):
+        rooms = self.rooms
+
+        # Message fields
+        room_id = rooms.get_room_id(sid)
+        room_lock = rooms.lock(room_id)
+        room_lock.acquire()
+        if not room_id:
+            room_lock.release()
+            return
+        json['name'] = rooms[room_id]['connections'][sid]
+
+        # If player is not in game, or spectating, their color is grey
+        if (rooms[room_id]['status'] != 'GAME') or (sid not in [
+                p.socket_id for p in rooms[room_id]['gc'].players]):
+            json['color'] = C.TEXT_COLORS['server']
+        else:
+            json['color'] = [p.color for p in rooms[room_id]
+                             ['gc'].players if p.socket_id == sid][0]
+        room_lock.release()
+
+        # Broadcast non-empty message
+        if 'data' in json and json['data'].strip():
+            json['data'] = html.escape(json['data'])
+            self.io.emit('message', json, room_id)
+
+    def on_join(self, sid, json):
+        rooms = self.rooms
+
+        # Get fields
+        room_id = json['room_id']
+        name = json['name']
+        reconnect = json['reconnect']
+        spectate = json['spectate']
+
+        # Tell everyone about the join
+        msg = '{} has joined the room!'
+        if spectate:
+            msg = '{} has joined the room as a spectator!'
+        elif reconnect:
+            msg = '{} has rejoined the room!'
+        self.socket_tell(msg, [name], None, room_id)
+
+        # Add player to room, creating it if it doesn't exist (spectators and
+        # reconnections need the room to exist). If the room closes before
+        # its lock is ours, the connection went with it, so try again
+        while True:
+            room = rooms.enter(room_id, sid, name,
+                               create=not (spectate or reconnect))
+            if not room:
+                self.io.disconnect(sid)
+                return
+            room_lock = rooms.lock(room_id)
+            room_lock.acquire()
+            if rooms.get(room_id) is room:
+                break
+            room_lock.release()
+
+        # If this is a reconnection event, change player's socket id and AI
+        # status in game context
+        if reconnect:
+            del room['reconnections'][name]
+            player = room['gc'].getPlayer(name)
+            player.socket_id = sid
+            player.ai = False
+            room['gc'].colors[name] = player.color
+            self.wake_ask(room['gc'], name)
+
+        # Join the socket.io room (io calls may yield, so never with a lock
+        # held)
+        room_lock.release()
+        self.io.enter_room(sid, room_id)
+
+        # Emit welcome message to new player
+        msg = 'Welcome to Shadow Hunters Room: ' + room_id
+        if spectate:
+            msg = 'You are now spectating Shadow Hunters Room: ' + room_id
+        elif reconnect:
+            msg = 'You\'ve rejoined your game in Shadow Hunters Room: '
+            msg += room_id
+        self.socket_tell(msg, [], None, room_id, client=(sid,))
+
+        # Tell player about other room members
+        members = [x for x in room['connections'].values() if x != name]
+        msg = 'There\'s no one else here!'
+        if members:
+            msg = 'Other players in the room: ' + ', '.join(members)
+        if not reconnect:
+            self.socket_tell(msg, [], None, room_id, client=(sid,))
+        self.flush(room_id)
+
+    def on_disconnect(self, sid):
+        rooms = self.rooms
+
+        # Get room_id, name, and game context, gracefully handling duplicate
+        # disconnects
+        room_id = rooms.get_room_id(sid)
+        room = rooms.get(room_id)
+        if not room:
+            return
+        name = room['connections'][sid]
+        gc = room['gc']
+        self.socket_tell('{} has left the room', [name], gc, room_id)
+
+        # Remove user from the room. If the room closed (or was replaced by a
+        # new one with the same id) before its lock is ours, the connection
+        # went with it
+        room_lock = rooms.lock(room_id)
+        room_lock.acquire()
+        if rooms.get(room_id) is not room:
+            room_lock.release()
+            return
+        rooms.disconnect(sid)
+
+        # Close room if it is now empty, or replace player with AI if it's in
+        # game
+        if not room['connections'].keys():
+
+            # Close the room, fast-forwarding its game if it's still running
+            if gc and not gc.game_over:
+                self.fast_forward(gc)
+            self.handler_calls.remove(room=room_id)
+            rooms.close(room_id)
+            room_lock.release()
+
+        elif gc and not gc.game_over:
+
+            # If disconnected person was spectating, or dead, or if the game
+            # is over, don't swap them for an AI
+            player_in_game = [p for p in gc.players if p.socket_id == sid]
+            if not player_in_game or \
+                    player_in_game[0].state == C.PlayerState.Dead:
+                room_lock.release()
+                self.flush(room_id)
+                return
+
+            # Swap player for AI
+            player_in_game[0].ai = True
+            self.wake_ask(gc, player_in_game[0].user_id)
+            room['reconnections'][player_in_game[0].user_id] = 'cookie'
+            room_lock.release()
+            self.socket_tell('A computer player has taken their place!',
+                             [], gc, room_id)
+            self.flush(room_id)
+
+        else:
+
+            # Always release lock!
+            room_lock.release()
+            self.flush(room_id)
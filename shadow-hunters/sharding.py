@@ -0,0 +1,263 @@
+import bisect
+import hashlib
+import itertools
+import os
+import pickle
+import struct
+import subprocess
+import sys
+
+import eventlet
+from eventlet.event import Event
+from eventlet.green import socket
+from eventlet.queue import LightQueue
+from eventlet.semaphore import Semaphore
+
+from room_server import RoomServer
+
+# sharding.py
+# Spreads rooms across worker processes. Each room is owned by one shard,
+# picked by a consistent hash of its room_id. A shard is either local (a
+# RoomServer in the front end's own process) or remote (a worker process
+# running a RoomServer, which the front end talks to over a Unix socket).
+#
+# The front end forwards each socket event to the shard that owns the room,
+# and a remote shard sends back the emits (and other socket.io operations)
+# for the front end to carry out.
+#
+# Usage (worker): python shadow-hunters/sharding.py /tmp/shadow-hunters-0.sock
+
+
+class HashRing:
+    """
+    Consistent hash ring. Every node is placed on the ring at `replicas`
+    points, and a key belongs to the node at the first point after the key's
+    hash, so adding or removing a node only moves the keys next to its
+    points.
+    """
+
+    def __init__(self, nodes, replicas=64):
+        self.ring = sorted(
+            (self._hash("{}#{}".format(node, i)), node)
+            for node in nodes for i in range(replicas)
+        )
+        self.points = [point for point, node in self.ring]
+
+    def _hash(self, key):
+        # Python's hash() is salted per process, so use a stable digest
+        digest = hashlib.md5(key.encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big')
+
+    def owner(self, key):
+        i = bisect.bisect(self.points, self._hash(key)) % len(self.points)
+        return self.ring[i][1]
+
+
+class Channel:
+    """Sends and receives pickled messages over a (green) socket."""
+
+    HEADER = struct.Struct('!I')
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.file = sock.makefile('rb')
+        self.send_lock = Semaphore()
+
+    def send(self, message):
+        payload = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        with self.send_lock:
+            self.sock.sendall(self.HEADER.pack(len(payload)) + payload)
+
+    def recv(self):
+        # Returns None once the other end has closed the channel
+        header = self.file.read(self.HEADER.size)
+        if len(header) < self.HEADER.size:
+            return None
+        (size,) = self.HEADER.unpack(header)
+        return pickle.loads(self.file.read(size))
+
+
+class ShardUnavailable(RuntimeError):
+    """A shard's worker didn't reply in time, or has gone."""
+
+
+class LocalShard:
+    """Rooms hosted by a RoomServer in the front end's own process."""
+
+    def __init__(self, io):
+        self.server = RoomServer(io)
+
+    def handle(self, event, sid, data=None):
+        return self.server.handle(event, sid, data)
+
+    def call(self, method, *args):
+        return getattr(self.server, method)(*args)
+
+
+class RemoteShard:
+    """Rooms hosted by a worker process, reached over a Unix socket. The
+    front end's `io` carries out the operations the worker sends back.
+
+    Calls raise ShardUnavailable if the worker doesn't reply within
+    `timeout` seconds, or has closed its end (e.g. it died), and events for a
+    worker that has gone are dropped."""
+
+    def __init__(self, path, io, timeout=10):
+        self.path = path
+        self.io = io
+        self.timeout = timeout
+        self.calls = {}
+        self.call_ids = itertools.count()
+        self.closed = False
+
+        # Wait for the worker to start listening
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        for _ in range(int(timeout / 0.1)):
+            try:
+                sock.connect(path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                eventlet.sleep(0.1)
+        else:
+            raise RuntimeError("No shard worker is listening at " + path)
+
+        self.channel = Channel(sock)
+        eventlet.spawn(self._receive)
+
+    def handle(self, event, sid, data=None):
+        if not self.closed:
+            self.channel.send(('event', event, sid, data))
+
+    def call(self, method, *args):
+        if self.closed:
+            raise ShardUnavailable(
+                "Shard worker at {} has gone".format(self.path))
+        call_id = next(self.call_ids)
+        event = self.calls[call_id] = Event()
+        timer = eventlet.Timeout(self.timeout)
+        try:
+            self.channel.send(('call', call_id, method, args))
+            return event.wait()
+        except eventlet.Timeout as timeout:
+            if timeout is not timer:
+                raise
+            raise ShardUnavailable("Shard worker at {} didn't reply to {} "
+                                   "in {}s".format(self.path, method,
+                                                   self.timeout))
+        finally:
+            timer.cancel()
+            self.calls.pop(call_id, None)
+
+    def _receive(self):
+        while True:
+            message = self.channel.recv()
+            if message is None:
+                break
+            op, args = message[0], message[1:]
+            if op == 'reply':
+
+                # Replies to calls that timed out are dropped
+                call_id, result = args
+                event = self.calls.get(call_id)
+                if event:
+                    event.send(result)
+            else:
+                getattr(self.io, op)(*args)
+
+        # The worker has gone, so fail the calls waiting on it
+        self.closed = True
+        for event in list(self.calls.values()):
+            event.send_exception(ShardUnavailable(
+                "Shard worker at {} has gone".format(self.path)))
+
+
+class WorkerIO:
+    """The io of a RoomServer in a worker process: socket.io operations are
+    sent to the front end, which carries them out."""
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def emit(self, event, data, room):
+        self.channel.send(('emit', event, data, room))
+
+    def enter_room(self, sid, room):
+        self.channel.send(('enter_room', sid, room))
+
+    def disconnect(self, sid):
+        self.channel.send(('disconnect', sid))
+
+    def sleep(self, seconds):
+        eventlet.sleep(seconds)
+
+    def create_queue(self):
+        return LightQueue()
+
+
+class Router:
+    """Routes socket events from the front end to the shard that owns each
+    room, keeping track of which room every connection is in."""
+
+    def __init__(self, shards):
+        self.shards = shards
+        self.ring = HashRing(range(len(shards)))
+        self.sid_index = {}
+
+    def shard(self, room_id):
+        return self.shards[self.ring.owner(room_id)]
+
+    def forward(self, event, sid, data=None):
+        # A connection is in the room it last joined. Events from connections
+        # that haven't joined a room are dropped
+        if event == 'join':
+            self.sid_index[sid] = data['room_id']
+        room_id = self.sid_index.get(sid)
+        if room_id is None:
+            return
+        if event == 'disconnect':
+            del self.sid_index[sid]
+        return self.shard(room_id).handle(event, sid, data)
+
+    def call(self, room_id, method, *args):
+        return self.shard(room_id).call(method, *args)
+
+
+def spawn_workers(n_workers, io, directory='/tmp'):
+    # Start n_workers worker processes and connect a shard to each of them
+    paths = [os.path.join(directory, 'shadow-hunters-{}-{}.sock'.format(
+        os.getpid(), i)) for i in range(n_workers)]
+    for path in paths:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), path])
+    return [RemoteShard(path, io) for path in paths]
+
+
+def serve(path):
+    # Worker main: host rooms for the front end that connects to `path`
+    if os.path.exists(path):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    sock, _ = listener.accept()
+    os.unlink(path)
+
+    channel = Channel(sock)
+    server = RoomServer(WorkerIO(channel))
+
+    def reply(call_id, method, args):
+        channel.send(('reply', call_id, getattr(server, method)(*args)))
+
+    # Every event gets its own greenlet, since games block in their handlers
+    while True:
+        message = channel.recv()
+        if message is None:
+            return
+        op, args = message[0], message[1:]
+        if op == 'event':
+            eventlet.spawn(server.handle, *args)
+        elif op == 'call':
+            eventlet.spawn(reply, *args)
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1])
@@ -0,0 +1,188 @@
+import argparse
+import multiprocessing
+import time
+from collections import Counter
+
+from helpers import fresh_gc_ef
+from utils import make_hash_sha256
+import constants as C
+
+# simulate.py
+# Runs headless games across a process pool and aggregates the results.
+#
+# Usage: python shadow-hunters/simulate.py -n 500 -p 4 5 6 7 8 -w 8
+#
+# `--regression-hash` prints the hash checked by the regression test instead.
+# `--backend numpy` plays the games with the vectorized backend (see
+# vectorized.py), which plays thousands of games at once. `--cross-check`
+# compares the outcome statistics of the two backends.
+
+
+def simulate_game(job):
+    """Play one headless game to completion. `job` is a (seed, n_players)
+    tuple so that the function can be mapped over a process pool."""
+
+    seed, n_players = job
+    gc, ef = fresh_gc_ef(n_players, seed=seed)
+    gc.play()
+
+    return {
+        'seed': seed,
+        'n_players': n_players,
+        'rounds': gc.round_count + 1,
+        'characters': [(p.character.name, p.character.alleg.name)
+                       for p in gc.players],
+        'winners': [(p.character.name, p.character.alleg.name)
+                    for p in gc.winners]
+    }
+
+
+def hash_game(job):
+    """Play one seeded game, hashing every intermediate state. Returns the
+    job with the game's hash."""
+
+    seed, n_players = job
+    gc, ef = fresh_gc_ef(n_players, seed=seed)
+    return job, gc.play(debug=True)
+
+
+def regression_hash(n_rounds=C.N_GAMEPLAY_TESTS, seed=C.TEST_RANDOM_SEED,
+                    workers=1):
+    """Hash a fixed set of games and combine the per-game hashes, keyed by
+    (seed, n_players). Every game has its own random stream, so the result
+    doesn't depend on the order the games are played in or on the number of
+    workers playing them."""
+
+    jobs = make_jobs(n_rounds, range(4, 9), seed)
+    if workers == 1:
+        game_hashes = [hash_game(j) for j in jobs]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            game_hashes = pool.map(hash_game, jobs)
+    return make_hash_sha256(sorted(game_hashes))
+
+
+def make_jobs(n_games, player_counts, seed=0):
+    """Give every game its own seed so that any single game can be replayed
+    with `simulate_game((seed, n_players))`."""
+
+    jobs = []
+    for n_players in player_counts:
+        for _ in range(n_games):
+            jobs.append((seed, n_players))
+            seed += 1
+    return jobs
+
+
+def run(jobs, workers=None, chunksize=16):
+    """Play every job, in parallel unless only one worker is requested.
+    Returns the list of per-game results and the elapsed wall time."""
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [simulate_game(j) for j in jobs]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = list(pool.imap_unordered(simulate_game, jobs,
+                                               chunksize=chunksize))
+    return results, time.perf_counter() - start
+
+
+def summarize(results, elapsed):
+    """Aggregate per-game results into win rates and game lengths."""
+
+    played = Counter()
+    won = Counter()
+    alleg_played = Counter()
+    alleg_won = Counter()
+    rounds = Counter()
+    games = Counter()
+
+    for r in results:
+        games[r['n_players']] += 1
+        rounds[r['n_players']] += r['rounds']
+        for name, alleg in r['characters']:
+            played[name] += 1
+            alleg_played[alleg] += 1
+        for name, alleg in r['winners']:
+            won[name] += 1
+            alleg_won[alleg] += 1
+
+    return {
+        'games': len(results),
+        'elapsed': elapsed,
+        'games_per_sec': len(results) / elapsed if elapsed else 0.0,
+        'rounds_by_players': {n: rounds[n] / games[n] for n in sorted(games)},
+        'character_win_rates': {
+            c: won[c] / played[c] for c in sorted(played)},
+        'allegiance_win_rates': {
+            a: alleg_won[a] / alleg_played[a] for a in sorted(alleg_played)}
+    }
+
+
+def format_summary(summary):
+    lines = ["{} games in {:.2f}s ({:.1f} games/sec)".format(
+        summary['games'], summary['elapsed'], summary['games_per_sec'])]
+
+    lines.append("\nMean game length (rounds)")
+    for n, r in summary['rounds_by_players'].items():
+        lines.append("  {} players: {:.2f}".format(n, r))
+
+    lines.append("\nWin rate by allegiance")
+    for a, w in summary['allegiance_win_rates'].items():
+        lines.append("  {:<10} {:.3f}".format(a, w))
+
+    lines.append("\nWin rate by character")
+    for c, w in summary['character_win_rates'].items():
+        lines.append("  {:<10} {:.3f}".format(c, w))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Simulate headless Shadow Hunters games in parallel.")
+    parser.add_argument('-n', '--n-games', type=int, default=100,
+                        help="games to play per player count")
+    parser.add_argument('-p', '--players', type=int, nargs='+',
+                        default=[4, 5, 6, 7, 8], choices=range(4, 9),
+                        help="player counts to simulate")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument('-s', '--seed', type=int, default=0,
+                        help="seed of the first game")
+    parser.add_argument('-b', '--backend', choices=['object', 'numpy'],
+                        default='object',
+                        help="simulation backend")
+    parser.add_argument('--cross-check', action='store_true',
+                        help="compare the outcome statistics of the backends")
+    parser.add_argument('--regression-hash', action='store_true',
+                        help="print the regression test's hash and exit")
+    args = parser.parse_args(argv)
+
+    if args.regression_hash:
+        print(regression_hash(workers=args.workers))
+        return
+
+    # The vectorized backend needs NumPy, so it's only imported when used
+    if args.cross_check:
+        import vectorized
+        rows = vectorized.cross_check(args.n_games, args.players, args.seed,
+                                      args.workers)
+        print(vectorized.format_cross_check(rows))
+        return
+
+    if args.backend == 'numpy':
+        import vectorized
+        batches, elapsed = vectorized.run(args.n_games, args.players,
+                                          args.seed)
+        print(format_summary(vectorized.summarize(batches, elapsed)))
+        return
+
+    jobs = make_jobs(args.n_games, args.players, args.seed)
+    results, elapsed = run(jobs, args.workers)
+    print(format_summary(summarize(results, elapsed)))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,9 @@ import constants as C
 # single_use.py
 # card.use(args) function implementations.
 
+# Characters that Chocolate heals
+LOW_HP = ["Allie", "Agnes", "Emi", "Ellen", "Ultra Soul", "Unknown"]
+
 # White single-use cards
 
 
@@ -96,8 +99,7 @@ def chocolate(args):
     or heal fully if already revealed"""
 
     data = {'options': ["Do nothing"]}
-    low_hp = ["Allie", "Agnes", "Emi", "Ellen", "Ultra Soul", "Unknown"]
-    if args['self'].character.name in low_hp:
+    if args['self'].character.name in LOW_HP:
         if args['self'].state == C.PlayerState.Hidden:
             data['options'].append("Reveal and heal fully")
         else:
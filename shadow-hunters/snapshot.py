@@ -0,0 +1,312 @@
+import importlib
+import json
+import random
+import zlib
+
+from elements import ElementFactory
+from game_context import GameContext
+from player import Player
+import constants as C
+
+# snapshot.py
+# Snapshots a GameContext into a compact binary blob, and restores a blob
+# into a working GameContext with new handlers attached.
+#
+# A snapshot holds the game's state as plain data: players, characters by
+# resource id, decks as card-id orders, the zones' areas, modifiers, the
+# dice and the random stream, and the turn position. Cards are referred to by
+# (deck, index into the deck's definitions), and modifier functions by their
+# qualified name, so modifiers must be module-level functions.
+#
+# The engine only pauses inside ask_h, so a game that is snapshotted in the
+# middle of a turn (e.g. while waiting on a player) is snapshotted as of the
+# start of the turn, with a log of what happened since (see Tracker). A
+# restored game replays the log to get back to where it was.
+
+VERSION = 1
+
+DECKS = ('white_cards', 'black_cards', 'hermit_cards')
+
+
+def _card_ids(gc):
+    # id(card) => (deck, index) for every card of the game
+    ids = {}
+    for d, name in enumerate(DECKS):
+        for i, card in enumerate(getattr(gc, name).definitions):
+            ids[id(card)] = (d, i)
+    return ids
+
+
+def _card(gc, ref):
+    return getattr(gc, DECKS[ref[0]]).definitions[ref[1]]
+
+
+def _encode_value(value):
+    # Modifier values are plain data, or module-level functions
+    if callable(value):
+        name = "{}.{}".format(value.__module__, value.__qualname__)
+        if '<' in name:
+            raise ValueError("Can't snapshot {}: only module-level "
+                             "functions can be snapshotted".format(name))
+        return {'fn': name}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and list(value) == ['fn']:
+        module, name = value['fn'].rsplit('.', 1)
+        return getattr(importlib.import_module(module), name)
+    return value
+
+
+def capture(gc):
+    """Returns the state of a game as plain data."""
+
+    card_ids = _card_ids(gc)
+    players = []
+    for p in gc.players:
+        players.append({
+            'user_id': p.user_id,
+            'socket_id': p.socket_id,
+            'color': p.color,
+            'ai': p.ai,
+            'character': p.character.resource_id,
+            'state': p.state.value,
+            'damage': p.damage,
+            'location': p.location.name if p.location else None,
+            'equipment': [card_ids[id(eq)] for eq in p.equipment],
+            'special_active': p.special_active,
+            'modifiers': {k: _encode_value(v)
+                          for k, v in p.modifiers.items()}
+        })
+
+    decks = []
+    for name in DECKS:
+        deck = getattr(gc, name)
+        decks.append({
+            'order': list(deck.order),
+            'discarded': list(deck.discarded),
+            'held': sorted(deck.held),
+            'holders': [[i, c.holder.user_id] for i, c in
+                        enumerate(deck.definitions) if c.holder]
+        })
+
+    version, internal, gauss = gc.rng.getstate()
+    return {
+        'version': VERSION,
+        'players': players,
+        'characters': [c.resource_id for c in gc.characters],
+        'areas': gc.getAreas(),
+        'decks': decks,
+        'modifiers': {k: _encode_value(v) for k, v in gc.modifiers.items()},
+        'turn_order': [p.user_id for p in gc.turn_order],
+        'turn': gc.turn,
+        'round_count': gc.round_count,
+        'game_over': gc.game_over,
+        'winners': [p.user_id for p in gc.winners],
+        'win_check_due': gc.win_check_due,
+        'dice': [[d.state, list(d.buffer)] for d in (gc.die4, gc.die6)],
+        'rng': [version, list(internal), gauss],
+        'log': []
+    }
+
+
+def encode(state):
+    """Encode a captured state into a compact binary blob."""
+
+    data = json.dumps(state, separators=(',', ':'))
+    return zlib.compress(data.encode('utf-8'), 9)
+
+
+def decode(blob):
+    state = json.loads(zlib.decompress(blob).decode('utf-8'))
+    if state.get('version') != VERSION:
+        raise ValueError("Unsupported snapshot version: {}".format(
+            state.get('version')))
+    return state
+
+
+def snapshot(gc, tracker=None):
+    """Snapshot a game. A game in the middle of a turn must have a Tracker,
+    which has the state at the start of the turn."""
+
+    if tracker and tracker.checkpoint:
+        state = dict(tracker.checkpoint, log=list(tracker.log))
+    else:
+        state = capture(gc)
+    return encode(state)
+
+
+def restore(blob, ask_h, tell_h, show_h, update_h):
+    """Restore a snapshot into a GameContext with the given handlers.
+    Returns the game and its Tracker: play resumes (with gc.play) at the
+    turn the game was on, and the tracker replays the turn's log before
+    handing over to the handlers."""
+
+    state = decode(blob)
+    rng = random.Random()
+    ef = ElementFactory(rng)
+    players = [Player(p['user_id'], p['socket_id'], p['color'], p['ai'])
+               for p in state['players']]
+    gc = GameContext(
+        players=players,
+        characters=ef.CHARACTERS,
+        black_cards=ef.BLACK_DECK,
+        white_cards=ef.WHITE_DECK,
+        hermit_cards=ef.HERMIT_DECK,
+        areas=ef.AREAS,
+        ask_h=ask_h,
+        tell_h=tell_h,
+        show_h=show_h,
+        update_h=update_h,
+        rng=rng
+    )
+
+    # Lay out the board and deal the characters as they were
+    areas = {a.name: a for z in gc.zones for a in z.areas}
+    gc.setBoard([areas[name] for name in state['areas']])
+    characters = {c.resource_id: c for c in ef.CHARACTERS}
+    gc.characters = [characters[name] for name in state['characters']]
+    for p, s in zip(players, state['players']):
+        p.setCharacter(characters[s['character']])
+
+    # Restore the decks and their cards' holders
+    for name, s in zip(DECKS, state['decks']):
+        deck = getattr(gc, name)
+        deck.order = s['order']
+        deck.discarded = s['discarded']
+        deck.held = set(s['held'])
+        for c in deck.definitions:
+            c.holder = None
+        for i, user_id in s['holders']:
+            deck.definitions[i].holder = gc.getPlayer(user_id)
+
+    # Restore the players (assigning a player's state and location keeps
+    # the game context's indexes current)
+    for p, s in zip(players, state['players']):
+        p.state = C.PlayerState(s['state'])
+        p.damage = s['damage']
+        p.location = areas[s['location']] if s['location'] else None
+        p.equipment = [_card(gc, ref) for ref in s['equipment']]
+        p.special_active = s['special_active']
+        p.resetModifiers()
+        for k, v in s['modifiers'].items():
+            p.modifiers[k] = _decode_value(v)
+
+    # Restore the game's progress, dice and random stream
+    gc.modifiers = {k: _decode_value(v) for k, v in state['modifiers'].items()}
+    gc.turn_order = [gc.getPlayer(u) for u in state['turn_order']]
+    gc.turn = state['turn']
+    gc.round_count = state['round_count']
+    gc.game_over = state['game_over']
+    gc.winners = [gc.getPlayer(u) for u in state['winners']]
+    gc.win_check_due = state['win_check_due']
+    for die, (die_state, buffer) in zip((gc.die4, gc.die6), state['dice']):
+        die.state = die_state
+        die.buffer = buffer
+    version, internal, gauss = state['rng']
+    rng.setstate((version, tuple(internal), gauss))
+
+    return gc, Tracker(gc, replay=state['log'])
+
+
+class _WatchedAgent:
+
+    # Stands in for a player's agent during an ask, noting whether the agent
+    # chose the answer
+    def __init__(self, agent):
+        self.agent = agent
+        self.chose = False
+
+    def choose_action(self, options, player, gc):
+        self.chose = True
+        return self.agent.choose_action(options, player, gc)
+
+    def choose_reveal(self, player, gc):
+        return self.agent.choose_reveal(player, gc)
+
+
+class Tracker:
+    """
+    Lets a game be snapshotted at any point of a turn. At the start of every
+    turn the tracker captures the game's state, and until the next turn it
+    logs every answer to an ask, as well as every reveal and special that
+    players use out of turn (which the server must report with `event`).
+    Answers that players' agents chose aren't logged, as the agents choose
+    them again from the same state and random stream. That includes the
+    answers of human players whose asks were handed to their agents (e.g.
+    on a disconnect or reconnect): what's logged depends on who chose an
+    answer, not on whether the player is an AI once it's chosen.
+
+    A restored game's tracker first replays the log it was snapshotted
+    with: answers are given again, reveals and specials are used again, and
+    nothing is told, shown or updated, since the players saw it all before.
+    Once the log runs out, the game's own handlers take over.
+    """
+
+    EVENTS = ('reveal', 'special')
+
+    def __init__(self, gc, replay=()):
+        self.gc = gc
+        self.checkpoint = None
+        self.log = []
+        self.ask_h = gc.ask_h
+        gc.ask_h = self.ask
+        gc.turn_h = self.turnStarted
+
+        self.replay = list(replay)
+        self.handlers = None
+        if self.replay:
+            self.handlers = (gc.tell_h, gc.show_h, gc.update_h)
+            gc.tell_h = lambda x, y, *z: 0
+            gc.show_h = lambda x, *y: 0
+            gc.update_h = lambda: 0
+
+    def turnStarted(self):
+        self.checkpoint = capture(self.gc)
+        self.log = []
+
+    def event(self, kind, user_id):
+        self.log.append([kind, user_id])
+
+    def ask(self, form, data, user_id):
+        gc = self.gc
+
+        # Use the reveals and specials replayed before this ask
+        while self.replay and self.replay[0][0] in Tracker.EVENTS:
+            kind, event_user_id = self.replay.pop(0)
+            player = gc.getPlayer(event_user_id)
+            if kind == 'reveal':
+                player.reveal()
+            else:
+                player.special_active = True
+                player.character.special(gc, player, turn_pos='now')
+            self.event(kind, event_user_id)
+
+        # Replay the answer, or hand over to the game's handlers
+        player = gc.getPlayer(user_id)
+        if self.replay:
+            entry = self.replay.pop(0)
+            if entry[0] == 'answer':
+                answer = entry[1]
+            else:
+                answer = player.agent.choose_action(
+                    data['options'], player=player, gc=gc)
+            self.log.append(entry)
+            return answer
+        if self.handlers:
+            gc.tell_h, gc.show_h, gc.update_h = self.handlers
+            self.handlers = None
+
+        # Note whether the player's agent chooses the answer, as the server
+        # hands a human's ask to their agent when they leave or rejoin
+        agent = player.agent = _WatchedAgent(player.agent)
+        try:
+            answer = self.ask_h(form, data, user_id)
+        finally:
+            player.agent = agent.agent
+        if agent.chose:
+            self.log.append(['ai'])
+        else:
+            self.log.append(['answer', answer])
+        return answer
@@ -154,11 +154,16 @@ def vampire(gc, player, turn_pos):
         gc.tell_h("{} ({}) used their special ability: {}", [
                   player.user_id, player.character.name,
                   player.character.special_desc])
-        player.modifiers['damage_dealt_fn'] = lambda player: player.moveDamage(
-            2, player)
+        player.modifiers['damage_dealt_fn'] = vampire_heal
         player.modifiers['special_active'] = True
 
 
+def vampire_heal(player):
+    # The Vampire heals 2 damage whenever they deal damage. Kept as a module
+    # function rather than a lambda so that it can be snapshotted
+    player.moveDamage(2, player)
+
+
 def werewolf(gc, player, turn_pos):
     if not player.modifiers['special_used']:
         player.modifiers['counterattack'] = True
@@ -183,8 +188,7 @@ def ultra_soul(gc, player, turn_pos):
             target = player.gc.ask_h(
                 'select', data, player.user_id)['value']
             if target != 'Decline':
-                target_Player = [
-                    p for p in gc.getLivePlayers() if p.user_id == target][0]
+                target_Player = gc.getPlayer(target)
                 target_Player.moveDamage(-3, player)
                 gc.tell_h("{}'s Murder Ray gave {} {} damage!",
                           [player.user_id, target, 3])
@@ -32,9 +32,11 @@ def test_fields():
     card_list = [c1, c2]
     d = Deck(cards=card_list)
 
-    # test fields
-    assert d.cards == card_list
+    # test fields (the deck keeps its own, shuffled, order)
+    assert sorted(d.cards, key=id) == sorted(card_list, key=id)
+    assert d.definitions == card_list
     assert not d.discard
+    assert not d.held
 
 
 def test_hashability():
@@ -102,6 +104,34 @@ def test_drawCard():
     assert(len(d.discard) + len(d.cards) == original_length - 1)
 
 
+def test_reshuffle():
+    c3 = Card("Card 3", "A third card", None, None, False, lambda: 2)
+    d = Deck(cards=[c1, c2, c3])
+
+    # Equipment is held until it is returned; other cards are discarded
+    drawn = [d.drawCard() for _ in range(3)]
+    assert not d.cards
+    assert d.held == {1}
+    assert sorted(d.discard, key=id) == sorted([c1, c3], key=id)
+
+    # Drawing from an empty deck reshuffles the discard pile into it,
+    # without copying any cards
+    redrawn = d.drawCard()
+    assert redrawn in (c1, c3)
+    assert len(d.cards) == 1 and len(d.discard) == 1
+
+    # Returned equipment can be drawn again
+    d.addToDiscard(c2)
+    assert not d.held
+    assert d.discard[-1] is c2
+
+    # Cards from another deck join this one
+    c4 = Card("Card 4", "A stray card", None, None, False, lambda: 3)
+    d.addToDiscard(c4)
+    assert d.discard[-1] is c4
+    assert d.definitions[-1] is c4
+
+
 def test_exceptions():
     with pytest.raises(ValueError):
         d1 = Deck(0)
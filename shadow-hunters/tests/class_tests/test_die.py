@@ -1,6 +1,8 @@
 import pytest
+import random
+from fractions import Fraction
 
-from die import Die
+from die import Die, MOVEMENT_ROLLS, ATTACK_ROLLS
 
 # test_die.py
 # Tests for the Die object
@@ -45,3 +47,40 @@ def test_roll():
 def test_exceptions():
     with pytest.raises(ValueError):
         d = Die(0)
+    with pytest.raises(ValueError):
+        d = Die(6, buffer_size=-1)
+
+
+def test_rng():
+
+    # Dice with equally seeded streams roll the same
+    d1 = Die(n_sides=6, rng=random.Random(3))
+    d2 = Die(n_sides=6, rng=random.Random(3))
+    assert [d1.roll() for _ in range(20)] == [d2.roll() for _ in range(20)]
+
+
+def test_buffered():
+
+    # Buffered dice roll within range, refill, and keep state
+    d6 = Die(n_sides=6, rng=random.Random(3), buffer_size=8)
+    rolls = [d6.roll() for _ in range(20)]
+    assert all(1 <= r <= 6 for r in rolls)
+    assert d6.state == rolls[-1]
+    assert len(d6.buffer) == 4
+
+    # Equally seeded buffered dice roll the same
+    d6_copy = Die(n_sides=6, rng=random.Random(3), buffer_size=8)
+    assert [d6_copy.roll() for _ in range(20)] == rolls
+
+
+def test_distributions():
+
+    # Check that the distributions sum to 1 over the right results
+    assert sum(MOVEMENT_ROLLS.values()) == 1
+    assert sum(ATTACK_ROLLS.values()) == 1
+    assert list(MOVEMENT_ROLLS) == list(range(2, 11))
+    assert list(ATTACK_ROLLS) == list(range(0, 6))
+
+    # Check a few known probabilities
+    assert MOVEMENT_ROLLS[7] == ATTACK_ROLLS[0] == Fraction(1, 6)
+    assert ATTACK_ROLLS[5] == Fraction(1, 24)
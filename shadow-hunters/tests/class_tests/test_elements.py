@@ -0,0 +1,36 @@
+import pytest
+
+import elements as E
+from elements import ElementFactory
+
+# test_elements.py
+# Tests for the shared element catalog and the per-game ElementFactory
+
+
+def test_catalog():
+
+    # The catalog is immutable and holds every card
+    assert isinstance(E.ALL_CARDS, tuple)
+    assert len(E.ALL_CARDS) == len(E.WHITE_CARDS) + len(E.BLACK_CARDS) + \
+        len(E.HERMIT_CARDS)
+    assert all(a.zone is None for a in E.AREAS)
+
+
+def test_factories_share_definitions():
+    ef1 = ElementFactory()
+    ef2 = ElementFactory()
+
+    # Characters are shared between games
+    assert ef1.CHARACTERS == list(E.CHARACTERS)
+    assert ef1.CHARACTERS is not ef2.CHARACTERS
+    assert all(a is b for a, b in zip(ef1.CHARACTERS, ef2.CHARACTERS))
+
+    # Cards and areas are per-game copies of the shared definitions
+    cards1 = ef1.WHITE_DECK.cards + ef1.BLACK_DECK.cards
+    cards2 = ef2.WHITE_DECK.cards + ef2.BLACK_DECK.cards
+    assert not {id(c) for c in cards1} & {id(c) for c in cards2}
+    assert not {id(c) for c in cards1} & {id(c) for c in E.ALL_CARDS}
+    ef1.AREAS[0].zone = 'bound'
+    assert ef2.AREAS[0].zone is None
+    assert E.AREAS[0].zone is None
+    assert ef1.AREAS[0].action is E.AREAS[0].action
@@ -1,7 +1,7 @@
 import pytest
 
 import constants as C
-from helpers import fresh_gc_ef
+from helpers import fresh_gc_ef, get_game_with_character
 import random
 
 # test_game_context.py
@@ -61,6 +61,48 @@ def test_getDeadPlayers():
     assert gc.getDeadPlayers() == [gc.players[0]]
 
 
+def test_player_indexes():
+    gc, ef = fresh_gc_ef()
+    p1, p2 = gc.players[0], gc.players[1]
+
+    # Check that players are indexed by user_id
+    assert gc.getPlayer(p2.user_id) is p2
+
+    # Check that moving players updates the location indexes
+    area = gc.zones[0].areas[0]
+    p2.move(area)
+    p1.move(area)
+    assert gc.getPlayersAt(area.name) == [p1, p2]
+    assert gc.getPlayersInZone(gc.zones[0]) == [p1, p2]
+    assert not gc.getPlayersAt(gc.zones[1].areas[0].name)
+
+    # Check that dead players leave every live index
+    p1.setDamage(14, p2)
+    assert gc.getPlayersAt(area.name) == [p2]
+    assert gc.getPlayersInZone(gc.zones[0]) == [p2]
+    assert gc.getLivePlayers(lambda p: p.location) == [p2]
+
+
+def test_board_tables():
+    gc, ef = fresh_gc_ef()
+
+    # Check that every roll but 7 leads to the area whose domain holds it
+    assert gc.getAreaFromRoll(7) is None
+    for z in gc.zones:
+        for a in z.areas:
+            for roll in a.domain:
+                assert gc.getAreaFromRoll(roll) is a
+    assert len(set(gc.getAreas())) == 6
+
+    # Check that players outside a zone are out of its range
+    p1, p2, p3 = gc.players[:3]
+    p1.move(gc.zones[0].areas[0])
+    p2.move(gc.zones[1].areas[0])
+    p3.move(gc.zones[2].areas[1])
+    assert gc.getPlayersOutsideZone(gc.zones[0]) == [p2, p3]
+    assert gc.getPlayersOutsideZone(gc.zones[1]) == [p1, p3]
+
+
 def test_checkWinConditions():
     gc, ef = fresh_gc_ef()
 
@@ -88,6 +130,41 @@ def test_checkWinConditions():
             if p.character.alleg == C.Alleg.Shadow]
 
 
+def test_checkWinConditions_events():
+    gc, ef, p = get_game_with_character("Bob")
+
+    # Check that win conditions are only re-evaluated after an event
+    assert not gc.checkWinConditions(tell=False)
+    assert not gc.win_check_due
+    p.move(gc.zones[0].areas[0])
+    assert not gc.win_check_due
+
+    # Check that a change of equipment is an event
+    p.equipment = ['dummy_equipment'] * 5
+    assert gc.win_check_due
+    assert p in gc.checkWinConditions(tell=False)
+
+    # Check that a death is an event
+    q = [pl for pl in gc.players if pl != p][0]
+    q.setDamage(14, q)
+    assert gc.win_check_due
+
+
+def test_setCharacter_reindexes():
+    gc, ef = fresh_gc_ef()
+    gc.checkWinConditions(tell=False)
+    p = gc.players[0]
+    old = p.character
+    new = [c for c in ef.CHARACTERS if c.alleg != old.alleg][0]
+
+    # Check that a change of character is counted, and is an event
+    live = dict(gc.live_allegs)
+    p.setCharacter(new)
+    assert gc.live_allegs[old.alleg] == live[old.alleg] - 1
+    assert gc.live_allegs[new.alleg] == live[new.alleg] + 1
+    assert gc.win_check_due
+
+
 def test_play():
     gc, ef = fresh_gc_ef()
 
@@ -0,0 +1,63 @@
+import pytest
+
+from helpers import fresh_gc_ef
+from lifecycle import RoomLifecycle, approximate_size
+from registry import RoomRegistry
+
+# test_lifecycle.py
+# Tests for the RoomLifecycle object
+
+
+def test_approximate_size():
+
+    # Objects are counted once, however often they're referred to
+    items = [bytes(1000)]
+    assert approximate_size([items, items]) < 2 * approximate_size(items)
+
+    # A game's handlers aren't followed out of the game
+    gc, ef = fresh_gc_ef(5, seed=0)
+    size = approximate_size(gc)
+    huge = [bytes(10 ** 6)]
+    gc.update_h = lambda: huge
+    assert approximate_size(gc) < size + 10 ** 6
+    assert size > 10 ** 4
+
+
+def test_state_and_expired():
+    now = [0]
+    rooms = RoomRegistry(clock=lambda: now[0])
+    lifecycle = RoomLifecycle(idle_ttl=100, finished_ttl=10)
+    room = rooms.create('r1')
+
+    # An idle lobby expires after idle_ttl
+    assert lifecycle.state(room) == 'lobby'
+    assert lifecycle.expired(room, 99) is None
+    assert lifecycle.expired(room, 100) == 'idle'
+
+    # A running game is kept while its room is active
+    room['status'] = 'GAME'
+    now[0] = 50
+    rooms.touch('r1')
+    assert lifecycle.state(room) == 'playing'
+    assert lifecycle.expired(room, 100) is None
+
+    # A finished game expires after finished_ttl, even if its room is active
+    room['finished'] = 60
+    assert lifecycle.state(room) == 'finished'
+    assert lifecycle.expired(room, 69) is None
+    assert lifecycle.expired(room, 70) == 'finished'
+
+
+def test_report():
+    rooms = RoomRegistry()
+    lifecycle = RoomLifecycle()
+    rooms.create('r1')
+    rooms.create('r2')['size'] = 100
+    rooms.create('r3').update(status='GAME', size=300)
+
+    # Check that rooms and their sizes are summed by state
+    assert lifecycle.report(rooms) == {
+        'lobby': {'rooms': 2, 'bytes': 100},
+        'playing': {'rooms': 1, 'bytes': 300},
+        'finished': {'rooms': 0, 'bytes': 0}
+    }
@@ -0,0 +1,58 @@
+import pytest
+
+import metrics as M
+
+# test_metrics.py
+# Tests for metrics and their Prometheus text format
+
+
+def test_counter_and_gauge():
+    c = M.Counter('calls_total', "Calls")
+    c.inc(room='r1', handler='ask')
+    c.inc(2, room='r1', handler='ask')
+    c.inc(room='r2', handler='tell')
+    assert c.samples() == [
+        ('', {'handler': 'ask', 'room': 'r1'}, 3),
+        ('', {'handler': 'tell', 'room': 'r2'}, 1)]
+
+    # Removing a room drops all of its series
+    c.remove(room='r1')
+    assert c.samples() == [('', {'handler': 'tell', 'room': 'r2'}, 1)]
+
+    g = M.Gauge('rooms', "Rooms")
+    g.set(4)
+    g.set(5)
+    assert g.samples() == [('', {}, 5)]
+
+
+def test_histogram():
+    h = M.Histogram('wait_seconds', "Waits", buckets=(1, 5))
+    for v in (0.5, 1, 3, 10):
+        h.observe(v, player='ai')
+
+    # Buckets are cumulative, and bounds are inclusive
+    assert h.samples() == [
+        ('_bucket', {'player': 'ai', 'le': '1.0'}, 2),
+        ('_bucket', {'player': 'ai', 'le': '5.0'}, 3),
+        ('_bucket', {'player': 'ai', 'le': '+Inf'}, 4),
+        ('_count', {'player': 'ai'}, 4),
+        ('_sum', {'player': 'ai'}, 14.5)]
+
+
+def test_render():
+    g = M.Gauge('rooms', "Open rooms")
+    g.set(2)
+
+    # Families from different shards are rendered as one
+    families = M.label([g.collect()], shard=0) + \
+        M.label([g.collect()], shard=1)
+    assert M.render(families) == "\n".join([
+        '# HELP rooms Open rooms',
+        '# TYPE rooms gauge',
+        'rooms{shard="0"} 2',
+        'rooms{shard="1"} 2']) + "\n"
+
+    # Label values are escaped
+    c = M.Counter('calls_total', "Calls")
+    c.inc(room='a"b\\c')
+    assert 'calls_total{room="a\\"b\\\\c"} 1' in M.render([c.collect()])
@@ -0,0 +1,54 @@
+import pytest
+
+from outbox import Outbox
+
+# test_outbox.py
+# Tests for the Outbox object
+
+
+def test_push():
+    now = [10.0]
+    outbox = Outbox(0.25, clock=lambda: now[0])
+
+    # Check that paced events are spaced out, and unpaced ones are not
+    outbox.push('message', 'a', 'r1')
+    outbox.push('display', 'b', 'r1')
+    outbox.push('ask', 'c', 'sid1', paced=False)
+    outbox.push('message', 'd', 'r1')
+    assert [at for e, d, to, at in outbox.pending] == [10.0, 10.25, 10.5, 10.5]
+
+    # Check that events are stamped no earlier than when they were pushed
+    now[0] = 20.0
+    outbox.push('message', 'e', 'r1')
+    assert outbox.pending[-1][3] == 20.0
+
+
+def test_coalesce():
+    outbox = Outbox(0.25)
+
+    # Check that only the latest update to each target is kept
+    outbox.push('update', 1, 'r1', coalesce=True)
+    outbox.push('message', 'a', 'r1')
+    outbox.push('update', 2, 'r1', coalesce=True)
+    outbox.push('update', 3, 'sid1', coalesce=True)
+    assert [(e, d) for e, d, to, at in outbox.pending] == [
+        ('message', 'a'), ('update', 2), ('update', 3)]
+
+    # Check that draining empties the outbox
+    assert len(outbox.drain()) == 3
+    assert len(outbox) == 0
+
+
+def test_frames():
+    outbox = Outbox(0.25, clock=lambda: 5.0)
+    outbox.push('message', 'a', 'r1')
+    outbox.push('ask', 'b', 'sid1', paced=False)
+    outbox.push('display', 'c', 'r1')
+
+    # Check that there is one frame per target, in order
+    frames = outbox.frames(outbox.drain())
+    assert frames == {
+        'r1': {'sent': 5.0, 'events': [['message', 'a', 5.0],
+                                       ['display', 'c', 5.25]]},
+        'sid1': {'sent': 5.0, 'events': [['ask', 'b', 5.25]]}
+    }
@@ -43,6 +43,33 @@ def test_fields():
     assert not dump['ai']
 
 
+def test_dump_cache():
+    gc, ef = H.fresh_gc_ef()
+    p = gc.players[0]
+
+    # Unchanged players reuse their dumps
+    dump = p.dump()
+    assert p.dump() is dump
+
+    # Changing a dumped field rebuilds the dump, leaving the old one intact
+    p.damage = 3
+    assert p.dump() is not dump
+    assert p.dump()['damage'] == 3 and dump['damage'] == 0
+
+    # Changes to the equipment list are detected too
+    dump = p.dump()
+    p.equipment.append(H.get_card_by_title(ef, "Talisman"))
+    assert p.dump()['equipment'] == [p.equipment[0].dump()]
+    assert dump['equipment'] == []
+
+    # Hidden players' public dumps hide their character
+    assert p.dumpPublic()['character'] == {}
+    assert p.dumpPublic()['damage'] == 3
+    p.state = C.PlayerState.Revealed
+    assert p.dumpPublic() == p.dump()
+    assert gc.dump()[0]['players'][0] is p.dumpPublic()
+
+
 def test_setCharacter():
     p = Player('Max', 'socket_id', lambda x, y, z: 5, False)
 
@@ -165,6 +192,51 @@ def test_giveEquipment():
     assert roly_hobe in p2.equipment
 
 
+def test_hasEquipment():
+
+    # Setup rigged game context
+    gc, ef = H.fresh_gc_ef()
+    p1 = gc.players[0]
+    p2 = gc.players[1]
+    robe = H.get_card_by_title(ef, "Holy Robe")
+
+    # Check that every kind of change to the equipment list is seen
+    assert not p1.hasEquipment("Holy Robe")
+    p1.equipment.append(robe)
+    assert p1.hasEquipment("Holy Robe")
+    p1.giveEquipment(p2, robe)
+    assert not p1.hasEquipment("Holy Robe")
+    assert p2.hasEquipment("Holy Robe")
+    p1.equipment += p2.equipment
+    assert p1.hasEquipment("Holy Robe")
+    p1.equipment = []
+    assert not p1.hasEquipment("Holy Robe")
+
+    # Check that the defence modifier is rebuilt with the equipment
+    p2.defend(p1, 3)
+    assert p2.damage == 2
+    p2.equipment.pop()
+    p2.defend(p1, 3)
+    assert p2.damage == 5
+
+
+def test_equipment_list():
+
+    # Setup rigged game context
+    gc, ef = H.fresh_gc_ef()
+    p1 = gc.players[0]
+    robe = H.get_card_by_title(ef, "Holy Robe")
+    axe = H.get_card_by_title(ef, "Rusted Broad Axe")
+    p1.equipment = [robe, axe]
+
+    # Check that the equipment list takes list methods' keyword arguments
+    p1.equipment.sort(key=lambda eq: eq.title)
+    assert p1.equipment == [robe, axe]
+    p1.equipment.sort(key=lambda eq: eq.title, reverse=True)
+    assert p1.equipment == [axe, robe]
+    assert p1.hasEquipment("Holy Robe")
+
+
 def test_attack():
 
     # Setup rigged game context
@@ -0,0 +1,95 @@
+import pytest
+
+from registry import RoomRegistry
+
+# test_registry.py
+# Tests for the RoomRegistry object
+
+
+def test_create_and_close():
+    rooms = RoomRegistry(clock=lambda: 10)
+
+    # Creating a room is idempotent
+    room = rooms.create('r1')
+    assert rooms.create('r1') is room
+    assert room == {'status': 'LOBBY', 'gc': None,
+                    'connections': {}, 'reconnections': {},
+                    'seq': 0, 'public_state': None,
+                    'outbox': None, 'active': 10,
+                    'finished': None, 'size': None}
+
+    # Closing a room drops its lock and its connections from the index
+    rooms.connect('r1', 'sid1', 'alice')
+    assert rooms.close('r1') is room
+    assert 'r1' not in rooms
+    assert 'r1' not in rooms.locks
+    assert rooms.get_room_id('sid1') is None
+    assert rooms.close('r1') is None
+
+
+def test_connections():
+    rooms = RoomRegistry()
+    rooms.create('r1')
+    rooms.create('r2')
+    rooms.connect('r1', 'sid1', 'alice')
+    rooms.connect('r2', 'sid2', 'bob')
+
+    # Sockets are indexed by room
+    assert rooms.get_room_id('sid1') == 'r1'
+    assert rooms.get_room_id('sid2') == 'r2'
+    assert rooms.get_room_id('sid3') is None
+    assert rooms['r1']['connections'] == {'sid1': 'alice'}
+
+    # Disconnecting removes the socket, and duplicate disconnects are no-ops
+    assert rooms.disconnect('sid1') == 'alice'
+    assert rooms.disconnect('sid1') is None
+    assert rooms.get_room_id('sid1') is None
+    assert not rooms['r1']['connections']
+
+
+def test_enter():
+    rooms = RoomRegistry()
+
+    # Entering creates the room and connects the socket in one step
+    room = rooms.enter('r1', 'sid1', 'alice')
+    assert rooms['r1'] is room
+    assert room['connections'] == {'sid1': 'alice'}
+    assert rooms.get_room_id('sid1') == 'r1'
+
+    # Rooms that don't exist aren't created without `create`
+    assert rooms.enter('r2', 'sid2', 'bob', create=False) is None
+    assert 'r2' not in rooms
+    assert rooms.get_room_id('sid2') is None
+    assert rooms.enter('r1', 'sid2', 'bob', create=False) is room
+
+
+def test_locks():
+    rooms = RoomRegistry()
+    rooms.create('r1')
+    rooms.create('r2')
+
+    # Each room has its own lock
+    assert rooms.lock('r1') is rooms.lock('r1')
+    assert rooms.lock('r1') is not rooms.lock('r2')
+    rooms.lock('r1').acquire()
+    assert rooms.lock('r2').acquire(blocking=False)
+
+    # Rooms that don't exist get a lock that guards nothing
+    assert rooms.lock('r3') is not rooms.lock('r3')
+    assert rooms.lock(None).acquire(blocking=False)
+    assert 'r3' not in rooms.locks
+
+
+def test_touch():
+    now = [0]
+    rooms = RoomRegistry(clock=lambda: now[0])
+    rooms.create('r1')
+
+    # Touching notes the time of a room's last activity
+    now[0] = 5
+    rooms.touch('r1')
+    assert rooms['r1']['active'] == 5
+
+    # Rooms that don't exist are ignored
+    rooms.touch('r2')
+    assert 'r2' not in rooms
@@ -0,0 +1,81 @@
+import pytest
+
+eventlet = pytest.importorskip("eventlet")
+import sharding  # noqa: E402
+from eventlet.green import socket  # noqa: E402
+
+# test_sharding.py
+# Tests for the HashRing, RemoteShard and Router objects
+
+
+def test_hash_ring():
+    ring = sharding.HashRing(range(4))
+    keys = ["room{}".format(i) for i in range(1000)]
+
+    # Check that owners are stable, and that every node owns some keys
+    owners = [ring.owner(k) for k in keys]
+    assert owners == [sharding.HashRing(range(4)).owner(k) for k in keys]
+    assert set(owners) == {0, 1, 2, 3}
+
+    # Check that adding a node only moves keys onto the new node
+    bigger = sharding.HashRing(range(5))
+    moved = [k for k, o in zip(keys, owners) if bigger.owner(k) != o]
+    assert all(bigger.owner(k) == 4 for k in moved)
+    assert len(moved) < len(keys) / 2
+
+
+class RecordingShard:
+    def __init__(self):
+        self.events = []
+
+    def handle(self, event, sid, data=None):
+        self.events.append((event, sid, data))
+
+
+def test_forward():
+    shards = [RecordingShard(), RecordingShard()]
+    router = sharding.Router(shards)
+    shard = router.shard('r1')
+
+    # Events from connections that haven't joined a room are dropped
+    router.forward('answer', 'sid1', {'value': 'Yes'})
+    assert not any(s.events for s in shards)
+
+    # Events are routed to the shard owning the connection's room
+    router.forward('join', 'sid1', {'room_id': 'r1', 'name': 'alice'})
+    router.forward('answer', 'sid1', {'value': 'Yes'})
+    router.forward('disconnect', 'sid1')
+    assert [e for e, sid, data in shard.events] == [
+        'join', 'answer', 'disconnect']
+    assert 'sid1' not in router.sid_index
+
+
+def test_unavailable_worker(tmp_path):
+
+    # A worker that accepts the front end's connection but never replies
+    path = str(tmp_path / 'worker.sock')
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    accepted = eventlet.spawn(listener.accept)
+    shard = sharding.RemoteShard(path, io=None, timeout=0.2)
+    worker, _ = accepted.wait()
+
+    # Check that calls time out rather than hang
+    with pytest.raises(sharding.ShardUnavailable):
+        shard.call('collect_metrics')
+    assert not shard.calls
+
+    # Check that a call waiting on the worker fails when the worker goes,
+    # and that later calls fail right away and events are dropped
+    shard.timeout = 10
+    waiting = eventlet.spawn(shard.call, 'collect_metrics')
+    eventlet.sleep(0.05)
+    worker.close()
+    with pytest.raises(sharding.ShardUnavailable):
+        waiting.wait()
+    with eventlet.Timeout(1):
+        with pytest.raises(sharding.ShardUnavailable):
+            shard.call('collect_metrics')
+    shard.handle('message', 'sid1', {'data': 'hi'})
+    listener.close()
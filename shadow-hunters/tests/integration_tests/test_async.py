@@ -0,0 +1,59 @@
+import pytest
+import asyncio
+
+from helpers import fresh_gc_ef
+
+# test_async.py
+# Tests for playing games on an asyncio event loop
+
+
+def run(coroutine):
+
+    # asyncio.run is only in Python 3.7+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def async_gc(seed):
+
+    # Same game as fresh_gc_ef, answered by a coroutine that yields to the
+    # event loop before every answer (assigned after the game is built, as
+    # servers do)
+    gc, ef = fresh_gc_ef(5, seed=seed)
+
+    async def ask(x, y, z):
+        await asyncio.sleep(0)
+        return {'value': gc.rng.choice(y['options'])}
+    gc.ask_h = ask
+    return gc
+
+
+def test_playAsync():
+    seeds = range(20)
+
+    async def play_all():
+        games = [async_gc(s).playAsync(debug=True) for s in seeds]
+        return await asyncio.gather(*games)
+
+    # Check that interleaved async games play the same as synchronous ones
+    expected = [fresh_gc_ef(5, seed=s)[0].play(debug=True) for s in seeds]
+    assert run(play_all()) == expected
+
+
+def test_await_only():
+
+    # Check that async handlers can't be called outside run_sync
+    gc = async_gc(0)
+    with pytest.raises(RuntimeError):
+        gc.play()
+
+    # Check that errors raised while awaiting reach the game's caller
+    async def fail(*args):
+        raise ValueError()
+    gc = async_gc(0)
+    gc.ask_h = fail
+    with pytest.raises(ValueError):
+        run(gc.playAsync())
@@ -0,0 +1,53 @@
+import pytest
+import json
+
+import benchmark as B
+
+# test_benchmark.py
+# Tests for the engine benchmark suite
+
+
+def test_run():
+    results = B.run(n_games=2, players=[4, 8])
+    names = set(results['metrics'])
+    assert {'games_per_sec.4', 'games_per_sec.8', 'take_turn.mean',
+            'take_turn.p99', 'dump.mean', 'color_format.mean',
+            'game_context_init.median', 'draw_card',
+            'make_hash_sha256'} == names
+    assert all(m['value'] > 0 for m in results['metrics'].values())
+
+
+def test_compare():
+    baseline = {'metrics': {
+        'fast': B.metric(100.0, 'games/s', higher_is_better=True),
+        'slow': B.metric(1.0, 's'),
+        'gone': B.metric(1.0, 's')
+    }}
+    results = {'metrics': {
+        'fast': B.metric(50.0, 'games/s', higher_is_better=True),
+        'slow': B.metric(1.1, 's')
+    }}
+
+    # Fewer games per second and more seconds are both slowdowns, and
+    # metrics missing from the results are skipped
+    rows = {row[0]: row for row in B.compare(baseline, results, 0.2)}
+    assert sorted(rows) == ['fast', 'slow']
+    assert rows['fast'][3] == pytest.approx(1.0) and rows['fast'][4]
+    assert rows['slow'][3] == pytest.approx(0.1) and not rows['slow'][4]
+
+
+def test_main(tmp_path):
+    path = str(tmp_path / 'baseline.json')
+    args = ['-n', '1', '-p', '4']
+
+    # Check that results compare cleanly against themselves, and fail
+    # against a baseline that is much faster
+    assert B.main(args + ['--save', path]) == 0
+    assert B.main(args + ['--compare', path, '-t', '100']) == 0
+    with open(path) as f:
+        baseline = json.load(f)
+    for m in baseline['metrics'].values():
+        m['value'] *= 1000 if m['higher_is_better'] else 0.001
+    with open(path, 'w') as f:
+        json.dump(baseline, f)
+    assert B.main(args + ['--compare', path]) == 1
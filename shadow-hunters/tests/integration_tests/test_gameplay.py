@@ -1,8 +1,7 @@
 import pytest
-import random
 
-from utils import make_hash_sha256
 from helpers import fresh_gc_ef
+from simulate import regression_hash
 import constants as C
 
 
@@ -26,15 +25,8 @@ def test_regression():
      - representation of public/private states change (including order)
      - constants.N_GAMEPLAY_TESTS changes
 
-    This test is somewhat slow to run because hashing is slow.
+    To regenerate it, run `python shadow-hunters/simulate.py --regression-hash`
+    on the stable branch.
     """
-    random.seed(C.TEST_RANDOM_SEED)
-    game_hashes = ""
-    for _ in range(C.N_GAMEPLAY_TESTS):
-        for n in range(4, 9):
-            gc, ef = fresh_gc_ef(n)
-            game_hashes += gc.play(debug=True)
-
-    correct_hash = 'F01h50UD+bJTj/mD3XCM9ocKOEDsCa3MjnnLznBjT+A='
-    found_hash = make_hash_sha256(game_hashes)
-    assert correct_hash == found_hash
+    correct_hash = 'JX3Ag+NnPltlbqsHO1v3SL3beYemayPrw0JYNgzSD80='
+    assert correct_hash == regression_hash()
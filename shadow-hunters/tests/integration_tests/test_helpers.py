@@ -0,0 +1,61 @@
+import pytest
+
+import constants as C
+from helpers import color_format, diff_public_state, fresh_gc_ef, COLOR_INDEX
+
+# test_helpers.py
+# Tests for the frontend communication helpers
+
+
+def test_color_index():
+    assert COLOR_INDEX['Talisman'] == C.TEXT_COLORS['White']
+    assert COLOR_INDEX['Machine Gun'] == C.TEXT_COLORS['Black']
+    assert COLOR_INDEX["Hermit's Slap"] == C.TEXT_COLORS['Green']
+    assert COLOR_INDEX['a Hermit Card'] == C.TEXT_COLORS['Green']
+    assert COLOR_INDEX['Valkyrie'] == C.TEXT_COLORS['shadow']
+    assert COLOR_INDEX['Shadow'] == C.TEXT_COLORS['shadow']
+    assert COLOR_INDEX['Ellen'] == C.TEXT_COLORS['hunter']
+    assert COLOR_INDEX['Bob'] == C.TEXT_COLORS['neutral']
+    assert COLOR_INDEX['Church'] == C.TEXT_COLORS['Church']
+
+
+def test_color_format():
+    gc, ef = fresh_gc_ef(4)
+    p = gc.players[0]
+    args = [p.user_id, "Talisman", 3, "Nobody"]
+    strings, colors = color_format("{} used {} for {} on {}!", args, gc)
+
+    # Strings interleave the format pieces with the arguments
+    assert strings == ['', p.user_id, ' used ', 'Talisman', ' for ', 3,
+                       ' on ', 'Nobody', '!']
+    assert args == [p.user_id, "Talisman", 3, "Nobody"]
+
+    # Every argument is colored and surrounded by server-colored text
+    server = C.TEXT_COLORS['server']
+    assert colors == [server, p.color, server, C.TEXT_COLORS['White'],
+                      server, C.TEXT_COLORS['number'], server, server, server]
+
+    # Without a game context, player names are server-colored
+    strings, colors = color_format("{} joined", [p.user_id], None)
+    assert colors == [server, server, server]
+
+
+def test_diff_public_state():
+    gc, ef = fresh_gc_ef(4)
+    old = gc.dump()[0]
+
+    # Nothing changed
+    assert diff_public_state(old, gc.dump()[0]) == {}
+
+    # Only the changed fields of the changed player are sent
+    gc.players[2].damage = 3
+    gc.players[2].special_active = True
+    patch = diff_public_state(old, gc.dump()[0])
+    assert patch == {'players': {2: {'damage': 3, 'special_active': True}}}
+
+    # Other changed fields are replaced whole
+    new = gc.dump()[0]
+    new['zones'] = new['zones'][::-1]
+    patch = diff_public_state(old, new)
+    assert patch['zones'] == new['zones']
+    assert set(patch) == {'players', 'zones'}
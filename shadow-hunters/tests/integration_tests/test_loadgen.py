@@ -0,0 +1,63 @@
+import socket
+
+import pytest
+
+# The load generator needs the python-socketio client, which the server's
+# python-socketio doesn't have (see requirements-loadtest.txt)
+socketio = pytest.importorskip("socketio")
+if not hasattr(socketio, 'Client'):
+    pytest.skip("no python-socketio client", allow_module_level=True)
+import loadgen as L  # noqa: E402
+
+# test_loadgen.py
+# Tests for the load generator's bookkeeping, and its bots
+
+
+def test_stats():
+    stats = L.Stats()
+    for ms in range(1, 101):
+        stats.record('ping', ms / 1000)
+    stats.count('games_finished', 2)
+
+    # Samples are handed out once, counts are kept
+    samples = stats.take()
+    assert L.percentile(samples['ping'], 50) == 0.051
+    assert L.percentile(samples['ping'], 99) == 0.1
+    assert stats.take() == {}
+    assert stats.counts['games_finished'] == 2
+
+
+def test_format_report():
+    report = {'elapsed': 2.0, 'rooms_started': 4, 'games_finished': 1,
+              'clients': 6, 'rejected': 0, 'server_cpu': 0.5,
+              'server_rss_mb': 100.0,
+              'ping': {'n': 3, 'p50': 0.01, 'p99': 0.02}}
+    line = L.format_report(report)
+    assert 'rooms    4' in line and 'cpu  50%' in line
+    assert 'ping p50 10ms p99 20ms' in line
+
+
+def test_bot():
+
+    # Start a server whose AI players answer at once
+    pytest.importorskip("flask_socketio")
+    pytest.importorskip("eventlet")
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = L.ServerProcess(port, ai_sleep=0, socket_sleep=0)
+    try:
+        server.wait_ready()
+        stats = L.Stats()
+        threads = L.start_room(server.url, 'test', 1, 4, stats, 0.0)
+        for t in threads:
+            t.join(60)
+    finally:
+        server.stop()
+
+    # Check that the bot joined, started the game, answered its asks and
+    # saw the game end
+    assert not any(t.is_alive() for t in threads)
+    assert stats.counts['connected'] == 1
+    assert stats.counts['games_finished'] == 1
+    assert stats.take()['ask_to_answer']
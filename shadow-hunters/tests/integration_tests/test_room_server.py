@@ -0,0 +1,278 @@
+import pytest
+import queue
+
+from room_server import RoomServer
+
+# test_room_server.py
+# Tests for hosting rooms with a RoomServer
+
+
+class RecordingIO:
+
+    # Records emits and disconnects, and never sleeps. on_emit(event, data,
+    # room) is called after every emit
+    def __init__(self, on_emit=None):
+        self.emits = []
+        self.disconnects = []
+        self.on_emit = on_emit
+
+    def emit(self, event, data, room):
+        self.emits.append((event, data, room))
+        if self.on_emit:
+            self.on_emit(event, data, room)
+
+    def sleep(self, seconds):
+        pass
+
+    def enter_room(self, sid, room):
+        pass
+
+    def disconnect(self, sid):
+        self.disconnects.append(sid)
+
+    def create_queue(self):
+        return queue.Queue()
+
+
+class LockCheckingIO(RecordingIO):
+
+    # Records, in `held`, every io call made while one of the server's room
+    # locks was held
+    def __init__(self, server, on_emit=None):
+        super().__init__(on_emit)
+        self.held = []
+        self.locks = []
+        lock = server.rooms.lock
+
+        def recorded_lock(room_id):
+            self.locks.append(lock(room_id))
+            return self.locks[-1]
+        server.rooms.lock = recorded_lock
+
+    def check(self, op):
+        if any(lock.locked() for lock in self.locks):
+            self.held.append(op)
+
+    def emit(self, event, data, room):
+        self.check('emit')
+        super().emit(event, data, room)
+
+    def enter_room(self, sid, room):
+        self.check('enter_room')
+
+    def disconnect(self, sid):
+        self.check('disconnect')
+        super().disconnect(sid)
+
+
+def join(server, sid, name):
+    server.handle('join', sid, {'room_id': 'r1', 'name': name,
+                                'reconnect': False, 'spectate': False})
+
+
+def close_before_lock(server):
+
+    # Close each room (e.g. as its last player leaves) right before the
+    # first time someone takes its lock. Returns the rooms closed
+    closed = []
+    lock = server.rooms.lock
+
+    def closing_lock(room_id):
+        if room_id in server.rooms and room_id not in closed:
+            closed.append(room_id)
+            server.rooms.close(room_id)
+        return lock(room_id)
+    server.rooms.lock = closing_lock
+    return closed
+
+
+def test_join_closing_room():
+
+    # Check that a player joining a room that closes joins a new room
+    server = RoomServer(RecordingIO())
+    closed = close_before_lock(server)
+    join(server, 'sid1', 'alice')
+    assert closed == ['r1']
+    assert server.rooms['r1']['connections'] == {'sid1': 'alice'}
+    assert server.rooms.get_room_id('sid1') == 'r1'
+
+    # Check that a spectator of a room that closes is disconnected
+    server = RoomServer(RecordingIO())
+    server.rooms.create('r1')
+    closed = close_before_lock(server)
+    server.handle('join', 'sid2', {'room_id': 'r1', 'name': 'bob',
+                                   'reconnect': False, 'spectate': True})
+    assert closed == ['r1'] and 'r1' not in server.rooms
+    assert server.io.disconnects == ['sid2']
+
+
+def test_disconnect_closing_room():
+
+    # A room closes, and a new one is opened with its id (e.g. by a join),
+    # while a player leaving it waits for its lock
+    server = RoomServer(RecordingIO())
+    join(server, 'sid1', 'alice')
+    lock = server.rooms.lock
+
+    def replacing_lock(room_id):
+        server.rooms.close(room_id)
+        server.rooms.create(room_id)
+        server.rooms.lock = lock
+        return lock(room_id)
+    server.rooms.lock = replacing_lock
+    server.handle('disconnect', 'sid1')
+
+    # Check that the new room is left alone
+    assert 'r1' in server.rooms
+    assert server.rooms['r1']['connections'] == {}
+
+
+def test_fast_forward():
+
+    # The only human leaves at their first ask
+    def on_emit(event, data, room):
+        if event == 'frame' and room == 'sid1' and \
+                any(e[0] == 'ask' for e in data['events']):
+            server.handle('disconnect', 'sid1')
+    server = RoomServer(RecordingIO(on_emit))
+    join(server, 'sid1', 'alice')
+    server.handle('start', 'sid1', {'n_players': 5})
+
+    # Check that the room closed and its game was played out unseen
+    assert 'r1' not in server.rooms
+    result = server.results[-1]
+    assert result['abandoned'] and result['winners']
+
+
+def test_frames():
+
+    # The only human answers every ask with its first option
+    def on_emit(event, data, room):
+        if event == 'frame' and room == 'sid1':
+            for e in data['events']:
+                if e[0] == 'ask':
+                    server.handle('answer', 'sid1',
+                                  {'value': e[1]['options'][0]})
+    io = RecordingIO(on_emit)
+    server = RoomServer(io)
+
+    # Lobby messages are emitted right away
+    join(server, 'sid1', 'alice')
+    assert io.emits and all(e[0] == 'message' for e in io.emits)
+
+    # Game events are sent in frames, with numbered updates
+    io.emits.clear()
+    server.handle('start', 'sid1', {'n_players': 4})
+    frames = [data for event, data, room in io.emits if event == 'frame']
+    assert frames
+    seqs = [e[1]['seq'] for f in frames for e in f['events']
+            if e[0] == 'update']
+    assert seqs == list(range(1, len(seqs) + 1))
+    assert server.results[-1]['abandoned'] is False
+
+
+def test_collect_metrics():
+    def on_emit(event, data, room):
+        if event == 'frame' and room == 'sid1':
+            for e in data['events']:
+                if e[0] == 'ask':
+                    server.handle('answer', 'sid1',
+                                  {'value': e[1]['options'][0]})
+    server = RoomServer(RecordingIO(on_emit))
+    join(server, 'sid1', 'alice')
+    server.handle('start', 'sid1', {'n_players': 4})
+
+    # Check the gauges, and that the game's handlers, turn phases and asks
+    # were measured
+    families = {f[0]: f[3] for f in server.collect_metrics()}
+    assert families['shadowhunters_rooms'] == [('', {}, 1)]
+    assert families['shadowhunters_connections'] == [('', {}, 1)]
+    assert families['shadowhunters_games_running'] == [('', {}, 0)]
+    handlers = {s[1]['handler'] for s in
+                families['shadowhunters_handler_calls_total']}
+    assert handlers >= {'ask', 'tell', 'update'}
+    phases = {s[1]['phase'] for s in
+              families['shadowhunters_turn_phase_seconds']}
+    assert phases >= {'movement', 'area', 'attack'}
+    players = {s[1]['player'] for s in
+               families['shadowhunters_ask_wait_seconds']}
+    assert players == {'ai', 'human'}
+
+
+def test_sweep():
+    now = [0]
+
+    # The only human stops answering at their first ask, and the room is
+    # swept once it has been idle for long enough
+    def on_emit(event, data, room):
+        if event == 'frame' and room == 'sid1' and \
+                any(e[0] == 'ask' for e in data['events']) and \
+                'r1' in server.rooms:
+            server.sweep()
+            now[0] = server.lifecycle.idle_ttl
+            server.sweep()
+    io = RecordingIO(on_emit)
+    server = RoomServer(io)
+    server.rooms.clock = lambda: now[0]
+    join(server, 'sid1', 'alice')
+    server.handle('start', 'sid1', {'n_players': 5})
+
+    # Check that the room was reclaimed, and its game played out unseen
+    assert 'r1' not in server.rooms
+    assert io.disconnects == ['sid1']
+    assert server.results[-1]['abandoned']
+    families = {f[0]: f[3] for f in server.collect_metrics()}
+    assert families['shadowhunters_rooms_reclaimed_total'] == \
+        [('', {'reason': 'idle'}, 1)]
+
+
+def test_sweep_finished():
+    now = [0]
+
+    def on_emit(event, data, room):
+        if event == 'frame' and room == 'sid1':
+            for e in data['events']:
+                if e[0] == 'ask':
+                    server.handle('answer', 'sid1',
+                                  {'value': e[1]['options'][0]})
+    io = RecordingIO(on_emit)
+    server = RoomServer(io)
+    server.rooms.clock = lambda: now[0]
+    join(server, 'sid1', 'alice')
+    server.handle('start', 'sid1', {'n_players': 4})
+
+    # A finished game's room is measured and kept until finished_ttl
+    report = server.sweep()
+    assert report['finished']['rooms'] == 1
+    assert report['finished']['bytes'] == server.rooms['r1']['size'] > 0
+    now[0] = server.lifecycle.finished_ttl
+    report = server.sweep()
+    assert report['finished']['rooms'] == 0
+    assert 'r1' not in server.rooms
+    assert io.disconnects == ['sid1']
+
+
+def test_io_outside_locks():
+
+    # Bob leaves at his first ask and Alice answers every ask, leaving at
+    # the end of the game
+    def on_emit(event, data, room):
+        if event == 'frame' and room in ('sid1', 'sid2'):
+            for e in data['events']:
+                if e[0] == 'ask' and room == 'sid2':
+                    server.handle('disconnect', 'sid2')
+                elif e[0] == 'ask':
+                    server.handle('answer', 'sid1',
+                                  {'value': e[1]['options'][0]})
+    server = RoomServer(None)
+    io = server.io = LockCheckingIO(server, on_emit)
+    join(server, 'sid1', 'alice')
+    join(server, 'sid2', 'bob')
+    server.handle('message', 'sid1', {'data': 'hi'})
+    server.handle('start', 'sid1', {'n_players': 5})
+    server.handle('disconnect', 'sid1')
+    assert 'r1' not in server.rooms
+
+    # Check that no io call was made with a room lock held, as io calls may
+    # yield (e.g. in a shard worker)
+    assert io.emits and not io.held
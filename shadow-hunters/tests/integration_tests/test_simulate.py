@@ -0,0 +1,50 @@
+import simulate as S
+
+# test_simulate.py
+# Tests for the headless batch simulator
+
+
+def test_make_jobs():
+    jobs = S.make_jobs(3, [4, 8], seed=10)
+    assert jobs == [(10, 4), (11, 4), (12, 4), (13, 8), (14, 8), (15, 8)]
+
+
+def test_simulate_game():
+
+    # Same seed, same game
+    r1 = S.simulate_game((7, 5))
+    r2 = S.simulate_game((7, 5))
+    assert r1 == r2
+    assert len(r1['characters']) == 5
+    assert r1['winners']
+    assert set(r1['winners']) <= set(r1['characters'])
+
+
+def test_run_and_summarize():
+    jobs = S.make_jobs(4, [4, 5, 6, 7, 8])
+
+    # Parallel and serial runs play the same games
+    serial, _ = S.run(jobs, workers=1)
+    parallel, elapsed = S.run(jobs, workers=2)
+    key = (lambda r: r['seed'])
+    assert sorted(serial, key=key) == sorted(parallel, key=key)
+
+    summary = S.summarize(parallel, elapsed)
+    assert summary['games'] == 20
+    assert sorted(summary['rounds_by_players']) == [4, 5, 6, 7, 8]
+    for rate in summary['allegiance_win_rates'].values():
+        assert 0 <= rate <= 1
+    assert S.format_summary(summary).startswith("20 games")
+
+
+def test_regression_hash():
+
+    # Games can be hashed in any order, by any number of workers
+    serial = S.regression_hash(n_rounds=2)
+    assert serial == S.regression_hash(n_rounds=2, workers=2)
+    assert serial != S.regression_hash(n_rounds=2, seed=0)
+
+
+def test_main(capsys):
+    S.main(['-n', '1', '-p', '4', '-w', '1'])
+    assert "games/sec" in capsys.readouterr().out
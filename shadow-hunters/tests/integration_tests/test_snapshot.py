@@ -0,0 +1,147 @@
+import pytest
+
+import snapshot
+from helpers import fresh_gc_ef
+from specials import vampire_heal
+
+# test_snapshot.py
+# Tests for snapshotting and restoring games
+
+
+def handlers(get_gc):
+    # The first player answers with the first option, and AI players answer
+    # with their agents, as on the server
+    def ask_h(form, data, user_id):
+        gc = get_gc()
+        player = gc.getPlayer(user_id)
+        if player.ai:
+            return player.agent.choose_action(
+                data['options'], player=player, gc=gc)
+        return {'value': data['options'][0]}
+    return {'ask_h': ask_h, 'tell_h': lambda x, y, *z: 0,
+            'show_h': lambda x, *y: 0, 'update_h': lambda: 0}
+
+
+def test_turn_snapshot():
+
+    # Snapshot games at the start of their second round
+    for seed in range(20):
+        gc, ef = fresh_gc_ef(6, seed=seed)
+        gc.ask_h = handlers(lambda: gc)['ask_h']
+        blobs = []
+
+        def turn_h():
+            if gc.round_count == 1 and not blobs:
+                blobs.append(snapshot.snapshot(gc))
+        gc.turn_h = turn_h
+        gc.play()
+        assert blobs
+
+        # Restored games play out exactly as the originals did
+        box = {}
+        restored, tracker = snapshot.restore(blobs[0], **handlers(
+            lambda: box['gc']))
+        box['gc'] = restored
+        restored.play()
+        assert restored.dump() == gc.dump()
+        assert [p.user_id for p in restored.winners] == \
+            [p.user_id for p in gc.winners]
+
+
+def test_mid_turn_snapshot():
+
+    # Snapshot games with a human player in the middle of a turn
+    for seed in range(20):
+        gc, ef = fresh_gc_ef(5, seed=seed)
+        gc.players[0].ai = False
+        gc.ask_h = handlers(lambda: gc)['ask_h']
+        tracker = snapshot.Tracker(gc)
+        blobs = []
+        n_asks = [0]
+        ask_h = tracker.ask_h
+
+        def counting_ask_h(form, data, user_id):
+            n_asks[0] += 1
+            if n_asks[0] == 25:
+                blobs.append(snapshot.snapshot(gc, tracker))
+            return ask_h(form, data, user_id)
+        tracker.ask_h = counting_ask_h
+        gc.play()
+        assert blobs
+
+        # Restored games replay the turn so far, then play out exactly as
+        # the originals did
+        box = {}
+        restored, tracker = snapshot.restore(blobs[0], **handlers(
+            lambda: box['gc']))
+        box['gc'] = restored
+        restored.play()
+        assert not tracker.replay
+        assert restored.dump() == gc.dump()
+
+
+def test_woken_ask_snapshot():
+
+    # Snapshot games with a human player whose asks are sometimes handed to
+    # their agent, as when they disconnect or reconnect mid-ask
+    for seed in range(20):
+        gc, ef = fresh_gc_ef(5, seed=seed)
+        gc.players[0].ai = False
+        tracker = snapshot.Tracker(gc)
+        box = {'gc': gc}
+        blobs = []
+        n_asks = [0]
+
+        def ask_h(form, data, user_id):
+            n_asks[0] += 1
+            if n_asks[0] == 25 and not blobs:
+                blobs.append(snapshot.snapshot(gc, tracker))
+            player = box['gc'].getPlayer(user_id)
+            if player.ai or n_asks[0] % 2:
+                return player.agent.choose_action(
+                    data['options'], player=player, gc=box['gc'])
+            return {'value': data['options'][0]}
+        tracker.ask_h = ask_h
+        gc.play()
+        assert blobs
+
+        # Restored games replay the agent's answers with the agent, then
+        # pick up at the ask they were snapshotted at
+        restored, tracker = snapshot.restore(blobs[0], **handlers(
+            lambda: box['gc']))
+        box['gc'] = restored
+        tracker.ask_h = ask_h
+        n_asks[0] = 24
+        restored.play()
+        assert not tracker.replay
+        assert restored.dump() == gc.dump()
+
+
+def test_snapshot_size():
+    gc, ef = fresh_gc_ef(8, seed=0)
+    gc.play()
+    assert len(snapshot.snapshot(gc)) < 8000
+
+
+def test_modifiers():
+    gc, ef = fresh_gc_ef(5, seed=0)
+    p = gc.players[0]
+
+    # Module-level functions are snapshotted by name
+    p.modifiers['damage_dealt_fn'] = vampire_heal
+    restored, tracker = snapshot.restore(snapshot.snapshot(gc), **handlers(
+        lambda: restored))
+    assert restored.players[0].modifiers['damage_dealt_fn'] is vampire_heal
+
+    # Lambdas can't be snapshotted
+    p.modifiers['damage_dealt_fn'] = lambda player: None
+    with pytest.raises(ValueError):
+        snapshot.snapshot(gc)
+
+
+def test_version():
+    gc, ef = fresh_gc_ef(5, seed=0)
+    state = snapshot.capture(gc)
+    state['version'] = snapshot.VERSION + 1
+    with pytest.raises(ValueError):
+        snapshot.decode(snapshot.encode(state))
@@ -1,5 +1,5 @@
 import pytest
-from utils import make_hash_sha256
+from utils import make_hash_sha256, StateHasher
 
 # test_utils.py
 
@@ -12,3 +12,29 @@ def test_make_hash_sha256():
     assert make_hash_sha256(w) == make_hash_sha256(x)
     assert make_hash_sha256(x) != make_hash_sha256(y)
     assert make_hash_sha256(y) != make_hash_sha256(z)
+
+
+def test_state_hasher():
+    def digest(*states):
+        h = StateHasher()
+        for s in states:
+            h.update(s)
+        return h.digest()
+
+    x = {'a': ['b', None, dict(c=dict(), d=(1, 2))], 'e': True}
+    y = {'a': ['b', None, dict(c=dict(), d=(1, 2))], 'e': True}
+    z = {'e': True, 'a': ['b', None, dict(c=dict(), d=(1, 2))]}
+
+    # Digests depend on contents, not on whether objects are shared
+    assert digest(x, x) == digest(x, y)
+
+    # Digests depend on the order of states and of keys
+    assert digest(x, z) != digest(z, x)
+    assert digest(x) != digest(z)
+    assert digest(x) != digest(x, x)
+
+    # Types are distinguished
+    assert digest([1]) != digest(['1'])
+    assert digest([1]) != digest([True])
+    with pytest.raises(TypeError):
+        digest({'a': object()})
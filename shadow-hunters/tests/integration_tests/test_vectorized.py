@@ -0,0 +1,100 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+import vectorized as V  # noqa: E402
+import simulate as S  # noqa: E402
+
+# test_vectorized.py
+# Tests for the vectorized simulation backend
+
+
+def test_setup():
+    b = V.Batch(500, 8, np.random.default_rng(0))
+
+    # Check that every game deals the right allegiances, without repeats
+    for alleg, count in V.ALLEG_COUNTS[8].items():
+        assert ((b.alleg == alleg.value).sum(axis=1) == count).all()
+    assert all(len(set(row)) == 8 for row in b.characters)
+
+    # Check that every zone holds two areas
+    for z in range(3):
+        assert ((b.zone_of_area == z).sum(axis=1) == 2).all()
+
+
+def test_play():
+    b = V.play(500, 6, seed=1)
+
+    # Check that every game ends with winners, and the dead out of play
+    assert b.game_over.all()
+    assert b.winners.any(axis=1).all()
+    dead = b.state == V.DEAD
+    assert (b.location[dead] == -1).all()
+    assert (b.damage[dead] == b.max_damage[dead]).all()
+    assert (b.damage <= b.max_damage).all()
+
+    # Check that every card is in its deck's draw pile or discard pile, or
+    # held by exactly one player
+    for d, cards in enumerate(V.DECKS):
+        for g in range(b.n_games):
+            piled = list(b.piles[d][g, :b.left[d][g]])
+            discarded = list(np.flatnonzero(b.discarded[d][g]))
+            held = [i for k, (e, i) in enumerate(V.EQUIPMENT)
+                    if e == d for mask in b.equipment[g] if mask >> k & 1]
+            assert sorted(piled + discarded + held) == list(range(len(cards)))
+
+    # Check that the same seed plays the same games
+    assert (V.play(500, 6, seed=1).winners == b.winners).all()
+
+
+def test_equipment():
+    b = V.Batch(1, 5, np.random.default_rng(0))
+    g, p, q = np.array([0]), np.array([0]), np.array([1])
+    hunter = V.CHAR_ALLEG[b.characters[0]].tolist().index(V.HUNTERS)
+
+    # Check that weapons add to successful attacks only, and that the Holy
+    # Robe takes 1 from attacks made and received
+    b.equipment[0, 0] = V.EQUIP["Chainsaw"] | V.EQUIP["Butcher Knife"]
+    assert b.damageDealt(g, p, q, np.array([3])) == 5
+    assert b.damageDealt(g, p, q, np.array([0])) == 0
+    b.equipment[0, 1] = V.EQUIP["Holy Robe"]
+    assert b.damageDealt(g, p, q, np.array([3])) == 4
+    assert b.damageDealt(g, q, p, np.array([1])) == 0
+
+    # Check that the Spear of Longinus only strikes for revealed Hunters
+    b.equipment[0] = 0
+    b.equipment[0, hunter] = V.EQUIP["Spear of Longinus"]
+    h, t = np.array([hunter]), np.array([(hunter + 1) % 5])
+    assert b.damageDealt(g, h, t, np.array([1])) == 1
+    b.state[0, hunter] = V.REVEALED
+    assert b.damageDealt(g, h, t, np.array([1])) == 3
+
+    # Check that a Guardian Angel stops attacks
+    b.guardian_angel[0, t] = True
+    assert b.damageDealt(g, h, t, np.array([6])) == 0
+
+
+def test_bob_wins():
+    b = V.play(200, 6, seed=2)
+    bob = b.win == V.BOB
+
+    # Check that Bob wins whenever he ends the game with 5 equipment cards
+    assert b.winners[bob & (V.EQUIP_COUNT[b.equipment] >= 5)].all()
+    assert b.winners[bob].any()
+
+
+def test_summarize():
+    batches, elapsed = V.run(200, [4, 5])
+    summary = V.summarize(batches, elapsed)
+    assert summary['games'] == 400
+    assert sorted(summary['rounds_by_players']) == [4, 5]
+    assert sorted(summary['allegiance_win_rates']) == [
+        'Hunter', 'Neutral', 'Shadow']
+
+    assert "Win rate by character" in S.format_summary(summary)
+
+
+def test_cross_check():
+
+    # Check that both backends agree
+    rows = V.cross_check(200, [5, 7], workers=1)
+    assert all(ok for stat, v1, v2, z, ok in rows)
@@ -1,5 +1,6 @@
 import hashlib
 import base64
+import struct
 
 
 def make_hashable(x):
@@ -21,3 +22,67 @@ def make_hash_sha256(x):
     hasher = hashlib.sha256()
     hasher.update(repr(make_hashable(x)).encode())
     return base64.b64encode(hasher.digest()).decode()
+
+
+class StateHasher:
+    """Incrementally hash a sequence of states (nested dicts, lists, and
+    tuples of scalars) into one running SHA-256 digest.
+
+    Every state is encoded in a compact, type-tagged binary format in which
+    each container is replaced by the SHA-256 digest of its own encoding
+    (a Merkle tree), and the root's encoding is fed to the running digest.
+    Containers that are the very same objects as in the previous state
+    reuse their digests, so only the parts of a state that changed are
+    re-encoded. States must therefore be treated as immutable once hashed
+    (as game dumps are). The result depends only on the contents of the
+    states, their order, and the order of the keys and elements within
+    them."""
+
+    def __init__(self):
+        self.hasher = hashlib.sha256()
+        self.cache = {}
+
+    def update(self, state):
+        cache, self.cache = self.cache, {}
+        self.hasher.update(b'|' + self._encode(state, cache))
+
+    def _encode(self, x, previous):
+
+        # Scalars are encoded in place
+        if x is None:
+            return b'N'
+        elif x is True:
+            return b'T'
+        elif x is False:
+            return b'F'
+        elif isinstance(x, int):
+            return b'i' + struct.pack('>q', x)
+        elif isinstance(x, float):
+            return b'f' + struct.pack('>d', x)
+        elif isinstance(x, str):
+            s = x.encode()
+            return b's' + struct.pack('>I', len(s)) + s
+
+        # Containers are encoded by digest, reused if unchanged since the
+        # previous state (the cache holds x itself, so its id can't be reused)
+        key = id(x)
+        if key in previous and previous[key][0] is x:
+            d = previous[key][1]
+        else:
+            if isinstance(x, dict):
+                parts = [b'd' + struct.pack('>I', len(x))]
+                for k, v in x.items():
+                    parts.append(self._encode(k, previous))
+                    parts.append(self._encode(v, previous))
+            elif isinstance(x, (list, tuple)):
+                parts = [b'l' + struct.pack('>I', len(x))]
+                for v in x:
+                    parts.append(self._encode(v, previous))
+            else:
+                raise TypeError("Can't hash {}".format(type(x).__name__))
+            d = hashlib.sha256(b''.join(parts)).digest()
+        self.cache[key] = (x, d)
+        return b'h' + d
+
+    def digest(self):
+        return base64.b64encode(self.hasher.digest()).decode()
@@ -0,0 +1,830 @@
+import time
+from collections import Counter
+
+import numpy as np
+
+import elements as E
+import simulate as S
+import single_use
+import specials
+import win_conditions as W
+import constants as C
+
+# vectorized.py
+# Implements a struct-of-arrays simulation backend, which plays thousands of
+# games at once with NumPy. Every per-player field (damage, state, location,
+# max damage, allegiance, win condition, special, and equipment) is an array
+# shaped (games x players), each game's decks are arrays of card indices, and
+# each step plays one turn in every unfinished game at once.
+#
+# The backend plays the rules of the object engine: dice, movement, the
+# areas, every card, equipment, attacks, deaths, character specials and the
+# win conditions, with every decision made the way the simulator's players
+# make them (see helpers.fresh_gc_ef): uniformly among the options offered,
+# 'Decline' included, except for revealing, which is left to the
+# RandomAgent. Where a card or an attack affects several players, they're
+# affected in seat order, as in the object engine. `cross_check` plays both
+# backends and compares their outcome statistics.
+
+# Win condition codes, indexed by the win condition they stand for
+SHADOW, HUNTER, ALLIE, BOB, CATHERINE = range(5)
+WIN_CODES = {
+    W.shadow: SHADOW,
+    W.hunter: HUNTER,
+    W.allie: ALLIE,
+    W.bob: BOB,
+    W.catherine: CATHERINE
+}
+
+# Special codes, indexed by the special they stand for
+(VALKYRIE, VAMPIRE, WEREWOLF, ULTRA_SOUL, ALLIE_HEAL, BOB_STEAL,
+ CATHERINE_HEAL, GEORGE, FUKA, FRANKLIN, ELLEN) = range(11)
+SPECIAL_CODES = {
+    specials.valkyrie: VALKYRIE,
+    specials.vampire: VAMPIRE,
+    specials.werewolf: WEREWOLF,
+    specials.ultra_soul: ULTRA_SOUL,
+    specials.allie: ALLIE_HEAL,
+    specials.bob: BOB_STEAL,
+    specials.catherine: CATHERINE_HEAL,
+    specials.george: GEORGE,
+    specials.fuka: FUKA,
+    specials.franklin: FRANKLIN,
+    specials.ellen: ELLEN
+}
+
+# Player states and allegiances, encoded as their enum values
+DEAD = C.PlayerState.Dead.value
+REVEALED = C.PlayerState.Revealed.value
+HIDDEN = C.PlayerState.Hidden.value
+SHADOWS = C.Alleg.Shadow.value
+HUNTERS = C.Alleg.Hunter.value
+
+# Characters of each allegiance in games of each size (as in GameContext)
+ALLEG_COUNTS = {
+    4: {C.Alleg.Hunter: 2, C.Alleg.Neutral: 0, C.Alleg.Shadow: 2},
+    5: {C.Alleg.Hunter: 2, C.Alleg.Neutral: 1, C.Alleg.Shadow: 2},
+    6: {C.Alleg.Hunter: 2, C.Alleg.Neutral: 2, C.Alleg.Shadow: 2},
+    7: {C.Alleg.Hunter: 2, C.Alleg.Neutral: 3, C.Alleg.Shadow: 2},
+    8: {C.Alleg.Hunter: 3, C.Alleg.Neutral: 2, C.Alleg.Shadow: 3},
+}
+
+# Catalog tables, indexed by position in E.CHARACTERS
+CHAR_ALLEG = np.array([c.alleg.value for c in E.CHARACTERS])
+CHAR_MAX_DAMAGE = np.array([c.max_damage for c in E.CHARACTERS])
+CHAR_WIN = np.array([WIN_CODES[c.win_cond] for c in E.CHARACTERS])
+CHAR_SPECIAL = np.array([SPECIAL_CODES[c.special] for c in E.CHARACTERS])
+CHAR_LOW_HP = np.array([c.name in single_use.LOW_HP for c in E.CHARACTERS])
+
+# Areas, by their position in E.AREAS
+AREA_NAMES = [a.name for a in E.AREAS]
+(HERMITS_CABIN, UNDERWORLD_GATE, CHURCH, CEMETERY, WEIRD_WOODS,
+ ERSTWHILE_ALTAR) = [AREA_NAMES.index(name) for name in (
+     "Hermit's Cabin", "Underworld Gate", "Church", "Cemetery",
+     "Weird Woods", "Erstwhile Altar")]
+
+# The area each roll of d4 + d6 leads to (-1 for 7, which lets the player
+# choose). Domains are fixed, so only the zones differ between games
+AREA_BY_ROLL = np.full(11, -1)
+for i, a in enumerate(E.AREAS):
+    AREA_BY_ROLL[a.domain] = i
+
+# Decks, and the deck each area draws from (-1 for areas that don't draw;
+# the Underworld Gate draws from a deck of the player's choice)
+WHITE, BLACK, HERMIT = range(3)
+DECKS = (E.WHITE_CARDS, E.BLACK_CARDS, E.HERMIT_CARDS)
+AREA_DECK = np.full(len(E.AREAS), -1)
+AREA_DECK[[HERMITS_CABIN, CHURCH, CEMETERY]] = [HERMIT, WHITE, BLACK]
+
+# Equipment cards, as (deck, card index) pairs. A player's equipment is a
+# bitmask, with bit k set if they hold EQUIPMENT[k]; EQUIP gives each card's
+# bit by title (no two equipment cards share a title)
+EQUIPMENT = [(d, i) for d, cards in enumerate(DECKS)
+             for i, c in enumerate(cards) if c.is_equipment]
+EQUIP = {DECKS[d][i].title: 1 << k for k, (d, i) in enumerate(EQUIPMENT)}
+
+# The equipment bit of every card in each deck (0 for single-use cards)
+CARD_BIT = [np.zeros(len(cards), dtype=np.int64) for cards in DECKS]
+for k, (d, i) in enumerate(EQUIPMENT):
+    CARD_BIT[d][i] = 1 << k
+
+# Tables indexed by equipment bitmask: the number of cards, and the bonus
+# their uses give to a successful attack and to a defence. Each use adds or
+# takes away a point (see Player._equipmentEffects), so they can be summed
+EQUIP_COUNT = np.zeros(1 << len(EQUIPMENT), dtype=np.int64)
+ATTACK_BONUS = np.zeros(1 << len(EQUIPMENT), dtype=np.int64)
+DEFENCE_BONUS = np.zeros(1 << len(EQUIPMENT), dtype=np.int64)
+for k, (d, i) in enumerate(EQUIPMENT):
+    held = (np.arange(1 << len(EQUIPMENT)) >> k) & 1
+    use = DECKS[d][i].use
+    EQUIP_COUNT += held
+    if use:
+        ATTACK_BONUS += held * (use(True, True, 1) - 1)
+        DEFENCE_BONUS += held * (use(False, False, 1) - 1)
+
+# The Batch method playing each single-use White and Black card, by the
+# card's use, and each card's index into CARD_EFFECTS (-1 for equipment)
+CARD_EFFECTS = [
+    (single_use.first_aid, 'firstAid'),
+    (single_use.judgement, 'judgement'),
+    (single_use.holy_water, 'holyWater'),
+    (single_use.advent, 'advent'),
+    (single_use.disenchant_mirror, 'disenchantMirror'),
+    (single_use.blessing, 'blessing'),
+    (single_use.chocolate, 'chocolate'),
+    (single_use.concealed_knowledge, 'concealedKnowledge'),
+    (single_use.guardian_angel, 'guardianAngel'),
+    (single_use.bloodthirsty_spider, 'bloodthirstySpider'),
+    (single_use.vampire_bat, 'vampireBat'),
+    (single_use.moody_goblin, 'steal'),
+    (single_use.diabolic_ritual, 'diabolicRitual'),
+    (single_use.banana_peel, 'bananaPeel'),
+    (single_use.dynamite, 'dynamite'),
+    (single_use.spiritual_doll, 'spiritualDoll')
+]
+CARD_EFFECT = [np.array([
+    -1 if c.is_equipment else [u for u, m in CARD_EFFECTS].index(c.use)
+    for c in cards]) for cards in (E.WHITE_CARDS, E.BLACK_CARDS)]
+
+# Hermit cards: whether each card applies to each character, the damage it
+# gives (or heals), and whether its target may give up equipment instead.
+# Hermit's Prediction only reveals the target to the player, which changes
+# nothing the RandomAgent acts on
+HERMITS = [c.use for c in E.HERMIT_CARDS]
+HERMIT_APPLIES = np.array([
+    [h.test(c) and h.name != "Prediction" for c in E.CHARACTERS]
+    for h in HERMITS])
+HERMIT_DAMAGE = np.array([h.dmg for h in HERMITS])
+HERMIT_EQ_OPT = np.array([h.eq_opt for h in HERMITS])
+
+
+def character_pool(n_players):
+    """Catalog indices of the characters available to a game of the given
+    size (the two Bobs differ only in their player counts)."""
+
+    excluded = "bob2" if n_players <= 6 else "bob1"
+    return [i for i, c in enumerate(E.CHARACTERS)
+            if c.resource_id != excluded]
+
+
+class Batch:
+    """
+    A batch of games with the same number of players, stored as arrays.
+    Games are rows and seats are columns; `g` always names an array of game
+    (row) indices, and `p` (`q`) the seat of the player (target) in each of
+    those games. No method is given the same game twice in one call.
+    """
+
+    def __init__(self, n_games, n_players, rng):
+        self.rng = rng
+        self.n_games = n_games
+        self.n_players = n_players
+        G, N = n_games, n_players
+
+        # Deal characters: the object engine keeps a uniformly random subset
+        # of each allegiance and hands them out in a random order
+        pool = character_pool(N)
+        dealt = []
+        for alleg, count in ALLEG_COUNTS[N].items():
+            candidates = np.array(
+                [i for i in pool if CHAR_ALLEG[i] == alleg.value])
+            if count:
+                order = rng.random((G, len(candidates))).argsort(axis=1)
+                dealt.append(candidates[order[:, :count]])
+        dealt = np.concatenate(dealt, axis=1)
+        seats = rng.random((G, N)).argsort(axis=1)
+        self.characters = np.take_along_axis(dealt, seats, axis=1)
+
+        # Per-player fields. A special is active once its player reveals
+        # themselves at the start of a turn (revealing by card doesn't
+        # activate it), and used once it's been used up or voided by Ellen
+        self.alleg = CHAR_ALLEG[self.characters]
+        self.max_damage = CHAR_MAX_DAMAGE[self.characters]
+        self.win = CHAR_WIN[self.characters]
+        self.special = CHAR_SPECIAL[self.characters]
+        self.damage = np.zeros((G, N), dtype=np.int64)
+        self.state = np.full((G, N), HIDDEN, dtype=np.int8)
+        self.location = np.full((G, N), -1, dtype=np.int64)
+        self.equipment = np.zeros((G, N), dtype=np.int64)
+        self.special_active = np.zeros((G, N), dtype=bool)
+        self.special_used = np.zeros((G, N), dtype=bool)
+        self.guardian_angel = np.zeros((G, N), dtype=bool)
+
+        # Bob steals equipment instead of dealing damage in games of up to 6
+        # players, and takes all of his victims' equipment in larger ones
+        self.bob_steals_all = N > 6
+
+        # Shuffle the areas across zones, two per zone
+        areas = rng.random((G, len(E.AREAS))).argsort(axis=1)
+        self.zone_of_area = np.empty((G, len(E.AREAS)), dtype=np.int64)
+        np.put_along_axis(self.zone_of_area, areas,
+                          np.arange(len(E.AREAS)) // 2, axis=1)
+
+        # Shuffle the decks. Game g's draw pile of deck d is
+        # piles[d][g, :left[d][g]], top last, and discarded[d][g] flags the
+        # cards in its discard pile
+        self.piles, self.left, self.discarded = [], [], []
+        for cards in DECKS:
+            self.piles.append(rng.random((G, len(cards))).argsort(axis=1))
+            self.left.append(np.full(G, len(cards)))
+            self.discarded.append(np.zeros((G, len(cards)), dtype=bool))
+
+        # Per-game fields
+        self.turn = rng.integers(0, N, G)
+        self.rounds = np.zeros(G, dtype=np.int64)
+        self.extra_turn = np.zeros(G, dtype=bool)
+        self.game_over = np.zeros(G, dtype=bool)
+        self.winners = np.zeros((G, N), dtype=bool)
+
+    def play(self):
+        live = np.arange(self.n_games)
+        while len(live):
+            p = self.turn[live]
+            alive = self.state[live, p] != DEAD
+            self.takeTurns(live[alive], p[alive])
+
+            # Advance the turn, unless Concealed Knowledge gave the player
+            # another, and the round when the turn order wraps
+            live = live[~self.game_over[live]]
+            again = self.extra_turn[live]
+            self.extra_turn[live] = False
+            advancing = live[~again]
+            self.turn[advancing] += 1
+            wrapped = advancing[self.turn[advancing] >= self.n_players]
+            self.turn[wrapped] = 0
+            self.rounds[wrapped] += 1
+
+    def takeTurns(self, g, p):
+        self.startPhase(g, p)
+
+        # A death or a win ends the turn early
+        g, p = self.continuingTurns(g, p)
+        self.movementPhase(g, p)
+        self.areaPhase(g, p)
+        g, p = self.continuingTurns(g, p)
+        self.attackPhase(g, p)
+        self.checkWinConditions(g)
+
+    def continuingTurns(self, g, p):
+        self.checkWinConditions(g)
+        going = ~self.game_over[g] & (self.state[g, p] != DEAD)
+        return g[going], p[going]
+
+    # Decisions and dice
+
+    def choose(self, options):
+        # Choose uniformly among each row's True options. Returns each row's
+        # choice (0 for rows without options)
+        keys = np.where(options, self.rng.random(options.shape), -1)
+        return keys.argmax(axis=1)
+
+    def coinFlip(self, size):
+        # Choose between two options
+        return self.rng.random(size) < 0.5
+
+    def withDecline(self, options, declinable=True):
+        # Add a 'Decline' option (the last column) to the options
+        declinable = np.broadcast_to(declinable, (len(options), 1))
+        return np.concatenate([options, declinable], axis=1)
+
+    def choosePlayer(self, g, p, include_self=False):
+        # Choose a live player (other than the chooser, unless include_self)
+        options = self.state[g] != DEAD
+        if not include_self:
+            options[np.arange(len(g)), p] = False
+        return self.choose(options)
+
+    def chooseEquipment(self, g, q):
+        # Choose one of each target's equipment cards, as a bitmask
+        held = (self.equipment[g, q][:, None] >> np.arange(len(EQUIPMENT)))
+        return 1 << self.choose((held & 1).astype(bool))
+
+    def rollDice(self, size, four=True, six=True):
+        r4 = self.rng.integers(1, 5, size) if four else 0
+        r6 = self.rng.integers(1, 7, size) if six else 0
+        return r4, r6
+
+    def attackRoll(self, g, p):
+        # Attacks roll |d6 - d4|, or the 4-sided die alone with the Cursed
+        # Sword Masamune or as the Valkyrie
+        r4, r6 = self.rollDice(len(g))
+        four = self.hasEquipment(g, p, "Cursed Sword Masamune") | \
+            self.hasSpecial(g, p, VALKYRIE)
+        return np.where(four, r4, np.abs(r6 - r4))
+
+    def hasEquipment(self, g, p, title):
+        return (self.equipment[g, p] & EQUIP[title]) != 0
+
+    def hasSpecial(self, g, p, code):
+        # Whether each player's special is in effect
+        return (self.special[g, p] == code) & self.special_active[g, p] & \
+            ~self.special_used[g, p]
+
+    # Phases of a turn
+
+    def startPhase(self, g, p):
+
+        # Guardian Angel wears off
+        self.guardian_angel[g, p] = False
+
+        # Reveal with increasing probability as the game progresses, which
+        # activates the player's special. Allie heals fully when she does
+        hidden = self.state[g, p] == HIDDEN
+        reveal = hidden & (self.rng.random(len(g)) <= self.rounds[g] / 20)
+        gr, pr = g[reveal], p[reveal]
+        self.state[gr, pr] = REVEALED
+        self.special_active[gr, pr] = True
+        heal = self.hasSpecial(gr, pr, ALLIE_HEAL)
+        self.setDamage(gr[heal], pr[heal], 0, pr[heal])
+        self.special_used[gr[heal], pr[heal]] = True
+
+        # Catherine heals 1 damage at the start of every turn
+        heal = self.hasSpecial(g, p, CATHERINE_HEAL)
+        self.moveDamage(g[heal], p[heal], 1, p[heal])
+
+        # Ultra Soul may give 3 damage to a player at the Underworld Gate
+        ultra_soul = self.hasSpecial(g, p, ULTRA_SOUL)
+        gu, pu = g[ultra_soul], p[ultra_soul]
+        at_gate = self.location[gu] == UNDERWORLD_GATE
+        at_gate[np.arange(len(gu)), pu] = False
+        target = self.choose(self.withDecline(at_gate))
+        firing = at_gate.any(axis=1) & (target < self.n_players)
+        self.moveDamage(gu[firing], target[firing], -3, pu[firing])
+
+        # The Hunters' specials are used once, at the start of a turn
+        for code in (GEORGE, FRANKLIN, FUKA, ELLEN):
+            using = self.hasSpecial(g, p, code)
+            gs, ps = g[using], p[using]
+            self.special_used[gs, ps] = True
+            target = self.choosePlayer(gs, ps, include_self=code == FUKA)
+            if code == GEORGE:
+                damage = self.rollDice(len(gs), six=False)[0]
+                self.moveDamage(gs, target, -damage, ps)
+            elif code == FRANKLIN:
+                damage = self.rollDice(len(gs), four=False)[1]
+                self.moveDamage(gs, target, -damage, ps)
+            elif code == FUKA:
+                self.setDamage(gs, target, 7, ps)
+            else:
+                # Voiding a special also ends its player's Guardian Angel
+                # (see Player.resetModifiers)
+                self.special_used[gs, target] = True
+                self.guardian_angel[gs, target] = False
+
+    def areaRoll(self, g, p):
+        current = self.location[g, p]
+
+        # Re-roll until the roll leads to an area other than the current one
+        roll = sum(self.rollDice(len(g)))
+        rolling = (roll != 7) & (AREA_BY_ROLL[roll] == current)
+        while rolling.any():
+            roll[rolling] = sum(self.rollDice(rolling.sum()))
+            rolling = (roll != 7) & (AREA_BY_ROLL[roll] == current)
+        return roll
+
+    def movementPhase(self, g, p):
+        current = self.location[g, p]
+        roll = self.areaRoll(g, p)
+
+        # The Mystic Compass rolls again, and lets the player choose either
+        # roll (a 7 on either lets them choose any area)
+        compass = (roll != 7) & self.hasEquipment(g, p, "Mystic Compass")
+        second = self.areaRoll(g[compass], p[compass])
+        use_second = (second == 7) | self.coinFlip(len(second))
+        roll[compass] = np.where(use_second, second, roll[compass])
+        dst = AREA_BY_ROLL[roll]
+
+        # A 7 lets the player choose any other area
+        seven = roll == 7
+        located = current[seven] >= 0
+        choice = self.rng.integers(0, len(E.AREAS) - located)
+        choice += located & (choice >= current[seven])
+        dst[seven] = choice
+
+        self.location[g, p] = dst
+
+    def areaPhase(self, g, p):
+
+        # Players take their area's action or decline to
+        acting = self.coinFlip(len(g))
+        g, p = g[acting], p[acting]
+        area = self.location[g, p]
+
+        # The Weird Woods heal a live player (possibly yourself) 1 damage, or
+        # give them 2 damage unless they have the Fortune Brooch
+        woods = area == WEIRD_WOODS
+        gw, pw = g[woods], p[woods]
+        target = self.choosePlayer(gw, pw, include_self=True)
+        heal = self.coinFlip(len(gw))
+        self.moveDamage(gw[heal], target[heal], 1, pw[heal])
+        hurt = ~heal & ~self.hasEquipment(gw, target, "Fortune Brooch")
+        self.moveDamage(gw[hurt], target[hurt], -2, pw[hurt])
+
+        # The Erstwhile Altar steals an equipment card
+        altar = area == ERSTWHILE_ALTAR
+        self.steal(g[altar], p[altar])
+
+        # The other areas draw a card
+        deck = AREA_DECK[area]
+        gate = area == UNDERWORLD_GATE
+        deck[gate] = self.rng.integers(0, len(DECKS), gate.sum())
+        for d in range(len(DECKS)):
+            drawing = deck == d
+            self.drawCard(g[drawing], p[drawing], d)
+
+    def attackPhase(self, g, p):
+
+        # Targets are the other live players in the attacker's zone, or the
+        # live players outside it with the Handgun
+        zone = self.zone_of_area[g, self.location[g, p]]
+        loc = self.location[g]
+        in_zone = np.take_along_axis(
+            self.zone_of_area[g], np.maximum(loc, 0), axis=1) == zone[:, None]
+        handgun = self.hasEquipment(g, p, "Handgun")
+        in_range = (loc >= 0) & (in_zone != handgun[:, None])
+        in_range[np.arange(len(g)), p] = False
+
+        # Players choose whether to attack, then a target or to decline,
+        # unless the Cursed Sword Masamune makes them attack a target if
+        # there is one. The Machine Gun hits every target in range, with the
+        # same roll
+        masamune = self.hasEquipment(g, p, "Cursed Sword Masamune")
+        target = self.choose(self.withDecline(in_range, ~masamune[:, None]))
+        attacking = (masamune | self.coinFlip(len(g))) & \
+            in_range.any(axis=1) & (target < self.n_players)
+        g, p, in_range = g[attacking], p[attacking], in_range[attacking]
+        target = target[attacking]
+        roll = self.attackRoll(g, p)
+        hit = in_range & self.hasEquipment(g, p, "Machine Gun")[:, None]
+        hit[np.arange(len(g)), target] = True
+        for q in range(self.n_players):
+            h = hit[:, q]
+            self.strike(g[h], p[h], np.full(h.sum(), q), roll[h])
+
+    # Attacks and damage
+
+    def strike(self, g, p, q, roll):
+
+        # Bob may steal an equipment card instead of giving 2 or more damage
+        bob = self.hasSpecial(g, p, BOB_STEAL) & (not self.bob_steals_all)
+        stealing = bob & (self.damageDealt(g, p, q, roll) >= 2) & \
+            (self.equipment[g, q] != 0) & self.coinFlip(len(g))
+        gs, ps, qs = g[stealing], p[stealing], q[stealing]
+        self.giveEquipment(gs, qs, ps, self.chooseEquipment(gs, qs))
+
+        g, p, q, roll = g[~stealing], p[~stealing], q[~stealing], \
+            roll[~stealing]
+        self.attack(g, p, q, roll)
+
+    def damageDealt(self, g, p, q, roll):
+        # The damage an attack with the given roll deals (see Player.attack
+        # and Player.defend): a successful attack gets the attacker's
+        # equipment bonus, and 2 more with the Spear of Longinus if they're
+        # a revealed Hunter. The target's equipment then reduces it, and the
+        # Guardian Angel stops it
+        spear = self.hasEquipment(g, p, "Spear of Longinus") & \
+            (self.alleg[g, p] == HUNTERS) & (self.state[g, p] == REVEALED)
+        amount = roll + ATTACK_BONUS[self.equipment[g, p]] + 2 * spear
+        amount = np.where(roll != 0, amount, 0)
+        amount = np.maximum(0, amount + DEFENCE_BONUS[self.equipment[g, q]])
+        return np.where(self.guardian_angel[g, q], 0, amount)
+
+    def attack(self, g, p, q, roll):
+        dealt = self.damageDealt(g, p, q, roll)
+        shielded = self.guardian_angel[g, q]
+        self.moveDamage(g, q, -dealt, p)
+
+        # The Werewolf may counterattack whenever they survive an attack that
+        # the Guardian Angel didn't stop
+        counter = ~shielded & (self.state[g, q] != DEAD) & \
+            self.hasSpecial(g, q, WEREWOLF) & self.coinFlip(len(g))
+        if counter.any():
+            gc, pc, qc = g[counter], p[counter], q[counter]
+            self.attack(gc, qc, pc, self.attackRoll(gc, qc))
+
+        # The Vampire heals 2 damage whenever they deal damage
+        heal = (dealt > 0) & (self.state[g, p] != DEAD) & \
+            self.hasSpecial(g, p, VAMPIRE)
+        self.moveDamage(g[heal], p[heal], 2, p[heal])
+
+    def moveDamage(self, g, p, damage_change, attacker):
+        damage = self.damage[g, p] - damage_change
+        self.setDamage(g, p, np.clip(damage, 0, self.max_damage[g, p]),
+                       attacker)
+
+    def setDamage(self, g, p, damage, attacker):
+        self.damage[g, p] = damage
+        dead = (self.damage[g, p] >= self.max_damage[g, p]) & \
+            (self.state[g, p] != DEAD)
+        self.die(g[dead], p[dead], attacker[dead])
+
+    def die(self, g, p, attacker):
+        self.state[g, p] = DEAD
+        self.location[g, p] = -1
+
+        # A killer takes all of the dead player's equipment with the Silver
+        # Rosary (or as Bob, in games of 7 or more), and one card otherwise
+        stealing = (self.equipment[g, p] != 0) & (attacker != p)
+        gs, ps, a = g[stealing], p[stealing], attacker[stealing]
+        take_all = self.hasEquipment(gs, a, "Silver Rosary") | (
+            self.hasSpecial(gs, a, BOB_STEAL) & self.bob_steals_all)
+        taken = np.where(take_all, self.equipment[gs, ps],
+                         self.chooseEquipment(gs, ps))
+        self.giveEquipment(gs, ps, a, taken)
+
+        # The rest goes back to the discard piles
+        for k, (d, i) in enumerate(EQUIPMENT):
+            held = ((self.equipment[g, p] >> k) & 1).astype(bool)
+            self.discarded[d][g[held], i] = True
+        self.equipment[g, p] = 0
+
+    # Equipment and cards
+
+    def giveEquipment(self, g, p, receiver, cards):
+        self.equipment[g, p] &= ~cards
+        self.equipment[g, receiver] |= cards
+
+    def steal(self, g, p):
+        # Steal an equipment card from a player who has any, if anyone does
+        options = self.state[g] != DEAD
+        options[np.arange(len(g)), p] = False
+        options &= self.equipment[g] != 0
+        stealing = options.any(axis=1)
+        target = self.choose(options)[stealing]
+        g, p = g[stealing], p[stealing]
+        self.giveEquipment(g, target, p, self.chooseEquipment(g, target))
+
+    def drawCard(self, g, p, d):
+        pile, left, discarded = self.piles[d], self.left[d], self.discarded[d]
+
+        # Shuffle the discard pile into the draw pile where that's empty
+        empty = g[left[g] == 0]
+        keys = np.where(discarded[empty],
+                        self.rng.random(discarded[empty].shape), 2)
+        pile[empty] = keys.argsort(axis=1)
+        left[empty] = discarded[empty].sum(axis=1)
+        discarded[empty] = False
+
+        # Equipment joins the player's arsenal, and other cards are
+        # discarded, then used
+        left[g] -= 1
+        cards = pile[g, left[g]]
+        bits = CARD_BIT[d][cards]
+        self.equipment[g, p] |= bits
+        discarded[g[bits == 0], cards[bits == 0]] = True
+        if d == HERMIT:
+            self.hermit(g, p, cards)
+            return
+        effects = CARD_EFFECT[d][cards]
+        for e in np.unique(effects[effects >= 0]):
+            using = effects == e
+            getattr(self, CARD_EFFECTS[e][1])(g[using], p[using])
+
+    def eachPlayer(self, g, hit, attacker, damage_change):
+        # Give damage to the players flagged in `hit`, in seat order
+        for q in range(self.n_players):
+            h = hit[:, q]
+            self.moveDamage(g[h], np.full(h.sum(), q), damage_change,
+                            attacker[h])
+
+    def revealAndHeal(self, g, p, eligible):
+        # Eligible players choose between doing nothing and revealing
+        # themselves (if they haven't) to heal fully
+        healing = eligible & self.coinFlip(len(g))
+        g, p = g[healing], p[healing]
+        self.state[g, p] = REVEALED
+        self.setDamage(g, p, 0, p)
+
+    def hermit(self, g, p, cards):
+        # The player gives the card to another player. If it applies to
+        # them, they heal or receive its damage (a card that heals gives 1
+        # damage to a player with none), or may give the player an
+        # equipment card instead
+        target = self.choosePlayer(g, p)
+        applies = HERMIT_APPLIES[cards, self.characters[g, target]]
+        g, p, q, cards = g[applies], p[applies], target[applies], \
+            cards[applies]
+        change = HERMIT_DAMAGE[cards]
+        change = np.where((change > 0) & (self.damage[g, q] == 0), -1, change)
+        giving = HERMIT_EQ_OPT[cards] & (self.equipment[g, q] != 0) & \
+            self.coinFlip(len(g))
+        self.giveEquipment(g[giving], q[giving], p[giving],
+                           self.chooseEquipment(g[giving], q[giving]))
+        self.moveDamage(g[~giving], q[~giving], change[~giving], p[~giving])
+
+    # Single-use cards (see single_use.py)
+
+    def firstAid(self, g, p):
+        target = self.choosePlayer(g, p, include_self=True)
+        self.setDamage(g, target, 7, p)
+
+    def judgement(self, g, p):
+        hit = self.state[g] != DEAD
+        hit[np.arange(len(g)), p] = False
+        self.eachPlayer(g, hit, p, -2)
+
+    def holyWater(self, g, p):
+        self.moveDamage(g, p, 2, p)
+
+    def advent(self, g, p):
+        self.revealAndHeal(g, p, self.alleg[g, p] == HUNTERS)
+
+    def disenchantMirror(self, g, p):
+        shadow = self.alleg[g, p] == SHADOWS
+        self.state[g[shadow], p[shadow]] = REVEALED
+
+    def blessing(self, g, p):
+        target = self.choosePlayer(g, p)
+        self.moveDamage(g, target, self.rollDice(len(g), four=False)[1], p)
+
+    def chocolate(self, g, p):
+        self.revealAndHeal(g, p, CHAR_LOW_HP[self.characters[g, p]])
+
+    def concealedKnowledge(self, g, p):
+        self.extra_turn[g] = True
+
+    def guardianAngel(self, g, p):
+        self.guardian_angel[g, p] = True
+
+    def bloodthirstySpider(self, g, p):
+        target = self.choosePlayer(g, p)
+        hit = ~self.hasEquipment(g, target, "Talisman")
+        self.moveDamage(g[hit], target[hit], -2, p[hit])
+        self.moveDamage(g, p, -2, p)
+
+    def vampireBat(self, g, p):
+        target = self.choosePlayer(g, p)
+        hit = ~self.hasEquipment(g, target, "Talisman")
+        g, p, target = g[hit], p[hit], target[hit]
+        self.moveDamage(g, target, -2, p)
+        self.moveDamage(g, p, 1, p)
+
+    def diabolicRitual(self, g, p):
+        self.revealAndHeal(g, p, (self.alleg[g, p] == SHADOWS) &
+                           (self.state[g, p] == HIDDEN))
+
+    def bananaPeel(self, g, p):
+        # Players with equipment choose between giving a card to another
+        # player and receiving 1 damage
+        giving = (self.equipment[g, p] != 0) & self.coinFlip(len(g))
+        gg, pg = g[giving], p[giving]
+        cards = self.chooseEquipment(gg, pg)
+        self.giveEquipment(gg, pg, self.choosePlayer(gg, pg), cards)
+        self.moveDamage(g[~giving], p[~giving], -1, p[~giving])
+
+    def dynamite(self, g, p):
+        # Everybody in the area rolled for receives 3 damage, except with
+        # the Talisman (nothing happens on a 7)
+        area = AREA_BY_ROLL[sum(self.rollDice(len(g)))]
+        hit = (self.location[g] == area[:, None]) & (area >= 0)[:, None] & \
+            ((self.equipment[g] & EQUIP["Talisman"]) == 0)
+        self.eachPlayer(g, hit, p, -3)
+
+    def spiritualDoll(self, g, p):
+        target = self.choosePlayer(g, p)
+        backfired = self.rollDice(len(g), four=False)[1] >= 5
+        self.moveDamage(g, np.where(backfired, p, target), -3, p)
+
+    def checkWinConditions(self, g):
+        alive = self.state[g] != DEAD
+        alleg, win = self.alleg[g], self.win[g]
+
+        def live(a): return (alive & (alleg == a.value)).sum(axis=1)
+        n_live = alive.sum(axis=1)
+        n_dead = self.n_players - n_live
+        dead_neutrals = (~alive & (alleg == C.Alleg.Neutral.value)).sum(axis=1)
+
+        no_living_hunters = live(C.Alleg.Hunter) == 0
+        no_living_shadows = live(C.Alleg.Shadow) == 0
+        first_to_die = ~alive & (n_dead == 1)[:, None]
+        last_two = alive & (n_live <= 2)[:, None]
+
+        winners = (
+            ((win == SHADOW) & (no_living_hunters | (dead_neutrals >= 3))[
+                :, None]) |
+            ((win == HUNTER) & no_living_shadows[:, None]) |
+            ((win == BOB) & (EQUIP_COUNT[self.equipment[g]] >= 5)) |
+            ((win == CATHERINE) & (first_to_die | last_two))
+        )
+
+        # Allie wins if she is still alive when the game ends
+        over = winners.any(axis=1)
+        winners |= (win == ALLIE) & alive & over[:, None]
+
+        self.game_over[g] = over
+        self.winners[g] = winners
+
+
+def play(n_games, n_players, seed=None):
+    """Play a batch of games and return it."""
+
+    batch = Batch(n_games, n_players, np.random.default_rng(seed))
+    batch.play()
+    return batch
+
+
+def run(n_games, player_counts, seed=0):
+    """Play n_games per player count. Returns the batches and the elapsed
+    wall time, like `simulate.run`."""
+
+    start = time.perf_counter()
+    batches = [play(n_games, n, seed + i) for i, n in enumerate(player_counts)]
+    return batches, time.perf_counter() - start
+
+
+def tally(batches):
+    """Count the games each character played and won, by catalog index."""
+
+    n_chars = len(E.CHARACTERS)
+    played = np.zeros(n_chars, dtype=np.int64)
+    won = np.zeros(n_chars, dtype=np.int64)
+    for b in batches:
+        played += np.bincount(b.characters.ravel(), minlength=n_chars)
+        won += np.bincount(b.characters[b.winners], minlength=n_chars)
+    return played, won
+
+
+def _by(key, counts):
+    # Sum per-character counts by key(character)
+    totals = Counter()
+    for c, n in zip(E.CHARACTERS, counts):
+        totals[key(c)] += int(n)
+    return totals
+
+
+def summarize(batches, elapsed):
+    """Aggregate batches into the summary `simulate.summarize` makes."""
+
+    played, won = tally(batches)
+    rounds = {}
+    for b in batches:
+        total, games = rounds.get(b.n_players, (0, 0))
+        rounds[b.n_players] = (total + (b.rounds + 1).sum(),
+                               games + b.n_games)
+
+    def rates(key):
+        p, w = _by(key, played), _by(key, won)
+        return {k: w[k] / p[k] for k in sorted(p) if p[k]}
+
+    n_games = sum(b.n_games for b in batches)
+    return {
+        'games': n_games,
+        'elapsed': elapsed,
+        'games_per_sec': n_games / elapsed if elapsed else 0.0,
+        'rounds_by_players': {
+            n: float(total / games)
+            for n, (total, games) in sorted(rounds.items())},
+        'character_win_rates': rates(lambda c: c.name),
+        'allegiance_win_rates': rates(lambda c: c.alleg.name)
+    }
+
+
+def cross_check(n_games, player_counts, seed=0, workers=None, tolerance=4):
+    """Play n_games per player count with both backends and compare their
+    win rates, by allegiance and by character, and their mean game lengths.
+    Returns rows of (statistic, object engine, vectorized, z-score, ok),
+    where ok is False if the backends differ by more than `tolerance`
+    standard errors."""
+
+    jobs = S.make_jobs(n_games, player_counts, seed)
+    results, _ = S.run(jobs, workers)
+    expected = S.summarize(results, 0)
+    batches, _ = run(n_games, player_counts, seed)
+    actual = summarize(batches, 0)
+
+    # Win rates are compared as proportions of the games played, which
+    # differ between the backends
+    played, _ = tally(batches)
+    rows = []
+    for i, stat in ((1, 'allegiance_win_rates'), (0, 'character_win_rates')):
+        n1 = Counter(c[i] for r in results for c in r['characters'])
+        n2 = _by(lambda c: (c.name, c.alleg.name)[i], played)
+        for key, p1 in expected[stat].items():
+            p2 = actual[stat][key]
+            pooled = (p1 * n1[key] + p2 * n2[key]) / (n1[key] + n2[key])
+            se = (pooled * (1 - pooled) * (1 / n1[key] + 1 / n2[key])) ** 0.5
+            rows.append(('{} win rate'.format(key), p1, p2, se))
+
+    for n_players, r1 in expected['rounds_by_players'].items():
+        lengths = [r['rounds'] for r in results
+                   if r['n_players'] == n_players]
+        mean = sum(lengths) / len(lengths)
+        var = sum((x - mean) ** 2 for x in lengths) / (len(lengths) - 1)
+        r2 = actual['rounds_by_players'][n_players]
+        se = (2 * var / len(lengths)) ** 0.5
+        rows.append(('rounds ({} players)'.format(n_players), r1, r2, se))
+
+    checked = []
+    for stat, v1, v2, se in rows:
+        z = (v2 - v1) / se if se else 0.0
+        checked.append((stat, v1, v2, z, abs(z) <= tolerance))
+    return checked
+
+
+def format_cross_check(rows):
+    lines = ["{:<22} {:>8} {:>10} {:>7}".format(
+        "Statistic", "Object", "Vectorized", "z")]
+    for stat, v1, v2, z, ok in rows:
+        lines.append("{:<22} {:>8.3f} {:>10.3f} {:>7.2f}{}".format(
+            stat, v1, v2, z, "" if ok else "  MISMATCH"))
+    return "\n".join(lines)
@@ -1,19 +1,15 @@
 import constants as C
 
 # win_conditions.py
+# Each condition is checked against the counts the game context keeps as
+# players die, so none of them has to scan the players.
 
 
 def shadow(gc, player):
 
     # Shadows win if all hunters are dead or 3 neutrals are dead
-    def is_hunter(p): return p.character.alleg == C.Alleg.Hunter
-    def is_neutral(p): return p.character.alleg == C.Alleg.Neutral
-
-    h = [p for p in gc.getLivePlayers() if is_hunter(p)]
-    n = [p for p in gc.getDeadPlayers() if is_neutral(p)]
-
-    no_living_hunters = len(h) == 0
-    neutrals_dead_3 = len(n) >= 3
+    no_living_hunters = gc.live_allegs[C.Alleg.Hunter] == 0
+    neutrals_dead_3 = gc.dead_allegs[C.Alleg.Neutral] >= 3
 
     return no_living_hunters or neutrals_dead_3
 
@@ -21,11 +17,7 @@ def shadow(gc, player):
 def hunter(gc, player):
 
     # Hunters win if all shadows are dead
-    def is_shadow(p): return p.character.alleg == C.Alleg.Shadow
-
-    s = [p for p in gc.getLivePlayers() if is_shadow(p)]
-
-    no_living_shadows = len(s) == 0
+    no_living_shadows = gc.live_allegs[C.Alleg.Shadow] == 0
 
     return no_living_shadows
 
@@ -33,7 +25,7 @@ def hunter(gc, player):
 def allie(gc, player):
 
     # Allie wins if she is still alive when the game ends
-    return (player in gc.getLivePlayers()) and gc.game_over
+    return player.isAlive() and gc.game_over
 
 
 def bob(gc, player):
@@ -45,8 +37,6 @@ def bob(gc, player):
 def catherine(gc, player):
 
     # Catherine wins if she is the first to die or one of the last 2 remaining
-    first_to_die = (player in gc.getDeadPlayers()) and (
-        len(gc.getDeadPlayers()) == 1)
-    last_two = (player in gc.getLivePlayers()) and (
-        len(gc.getLivePlayers()) <= 2)
+    first_to_die = not player.isAlive() and len(gc.dead_players) == 1
+    last_two = player.isAlive() and len(gc.live_players) <= 2
     return first_to_die or last_two
@@ -73,6 +73,7 @@ var GameBoard = new Phaser.Class ({
         this.gameData = data;
         if("private" in this.gameData) this.charInfo = this.gameData.private.character;
         this.allPlayersInfo = this.gameData.public.players;
+        this.updateSeq = ("seq" in this.gameData) ? this.gameData.seq : -1;
 
     },
 
@@ -362,6 +363,9 @@ var GameBoard = new Phaser.Class ({
             self.updateBoard(data);
         });
 
+        // Catch up on any update sent before the board was listening
+        socket.emit('resync');
+
         //socet receiver for displaying stuff
         socket.on('display', function(data) {
             switch(data.type) {
@@ -756,8 +760,47 @@ var GameBoard = new Phaser.Class ({
           ]);
   },
 
+    //apply a numbered update from the server to the public state. updates
+    //carry either a patch against the previous update or the full state. if
+    //an update was missed, ask the server for the full state instead.
+    applyUpdate: function(data) {
+        if(data.seq < this.updateSeq) {
+            return false;
+        }
+        else if("full" in data) {
+            this.gameData.public = data.full;
+        }
+        else if(data.seq === this.updateSeq + 1) {
+            var state = this.gameData.public;
+            for(var key in data.patch) {
+                if(key === "players" && !Array.isArray(data.patch.players)) {
+                    // copy, rather than modify, each patched player so that
+                    // it can still be compared against the previous update
+                    for(var i in data.patch.players) {
+                        state.players[i] = Object.assign({}, state.players[i], data.patch.players[i]);
+                    }
+                }
+                else {
+                    state[key] = data.patch[key];
+                }
+            }
+        }
+        else {
+            socket.emit('resync');
+            return false;
+        }
+        this.updateSeq = data.seq;
+        return true;
+    },
+
     //for each update, change parts of the board that need to be redrawn.
     updateBoard: function(data) {
+        //patch the public state unless given a whole one
+        if("seq" in data) {
+            if(!this.applyUpdate(data)) return;
+            data = this.gameData.public;
+        }
+
         //loop through each player and see if there are things to update
         this.allPlayersInfo = data.players;
         var count = 0;
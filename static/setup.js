@@ -77,6 +77,37 @@ $('document').ready(function() {
             $('#select').empty();
         });
 
+        // Receive a frame of game events. Each event is stamped with the
+        // server time to display it at, so play them out on that schedule
+        // (mapped onto our clock by the time the frame was sent), handing
+        // each one to this socket's handler for its event
+        var playout = [];
+        var playTimer = null;
+        var playNext = function() {
+            playTimer = null;
+            while(playout.length > 0) {
+                var wait = playout[0].at - Date.now();
+                if(wait > 0) {
+                    playTimer = setTimeout(playNext, wait);
+                    return;
+                }
+                var e = playout.shift();
+                socket.listeners(e.event).forEach(function(handler) {
+                    handler(e.data);
+                });
+            }
+        };
+        socket.on('frame', function(frame) {
+            var offset = Date.now() - frame.sent * 1000;
+            for(var i = 0; i < frame.events.length; i++) {
+                var e = frame.events[i];
+                playout.push({ 'event': e[0], 'data': e[1], 'at': e[2] * 1000 + offset });
+            }
+            if(playTimer === null) {
+                playNext();
+            }
+        });
+
         // Receive a message
         socket.on('message', function(msg) {
 